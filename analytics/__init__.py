@@ -2,16 +2,58 @@
 Analytics package for CityPulse IoT.
 
 Includes:
-- processor.py: Pandas and NumPy heavy computations
+- processor.py: NumPy heavy computations (pandas only for DataFrame I/O)
+- backends.py: Grouped-aggregation engines (NumPy, pandas, Polars, Arrow)
+- sketches.py: Mergeable KLL quantile and HyperLogLog distinct-count sketches
 - memory_manager.py: Weak reference caching and GC control
+
+Public names are resolved lazily (PEP 562), so importing the package does
+not pull in pandas/NumPy until a processor function is actually used.
 """
 
-from analytics.processor import resample_per_minute, calculate_heatmap_index
-from analytics.memory_manager import SensorCache, force_cleanup
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict
+
+from lazy_imports import lazy_attrs
+
+if TYPE_CHECKING:
+    from analytics.memory_manager import SensorCache, force_cleanup
+    from analytics.backends import available_backends, get_backend
+    from analytics.processor import (
+        calculate_heatmap_index,
+        grouped_mean,
+        resample_mean,
+        resample_per_minute,
+    )
+    from analytics.sketches import GroupSketches, HyperLogLog, KLLSketch
+
+_LAZY_ATTRS: Dict[str, str] = {
+    "resample_per_minute": "analytics.processor",
+    "calculate_heatmap_index": "analytics.processor",
+    "grouped_mean": "analytics.processor",
+    "resample_mean": "analytics.processor",
+    "available_backends": "analytics.backends",
+    "get_backend": "analytics.backends",
+    "KLLSketch": "analytics.sketches",
+    "HyperLogLog": "analytics.sketches",
+    "GroupSketches": "analytics.sketches",
+    "SensorCache": "analytics.memory_manager",
+    "force_cleanup": "analytics.memory_manager",
+}
 
 __all__ = [
     "resample_per_minute",
     "calculate_heatmap_index",
+    "grouped_mean",
+    "resample_mean",
+    "available_backends",
+    "get_backend",
+    "KLLSketch",
+    "HyperLogLog",
+    "GroupSketches",
     "SensorCache",
     "force_cleanup",
 ]
+
+__getattr__, __dir__ = lazy_attrs(globals(), _LAZY_ATTRS)
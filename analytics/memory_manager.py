@@ -4,6 +4,15 @@ import gc
 import weakref
 from typing import Any
 
+from telemetry.metrics import REGISTRY
+
+_CACHE_HITS = REGISTRY.counter(
+    "citypulse_sensor_cache_hits_total", "SensorCache lookups that found an object."
+)
+_CACHE_MISSES = REGISTRY.counter(
+    "citypulse_sensor_cache_misses_total", "SensorCache lookups that found nothing."
+)
+
 
 class SensorCache:
     """
@@ -20,7 +29,12 @@ class SensorCache:
         self._cache[sensor_id] = sensor_obj
 
     def get(self, sensor_id: str) -> Any | None:
-        return self._cache.get(sensor_id)
+        sensor_obj = self._cache.get(sensor_id)
+        if sensor_obj is None:
+            _CACHE_MISSES.inc()
+        else:
+            _CACHE_HITS.inc()
+        return sensor_obj
 
     def size(self) -> int:
         return len(self._cache)
@@ -1,13 +1,85 @@
 from __future__ import annotations
 
 import time
-from typing import Tuple
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, Tuple
 
 import numpy as np
-import pandas as pd
 
+from analytics.backends import select_backend
+from telemetry.instrumentation import timed
 
-def resample_per_minute(df: pd.DataFrame) -> pd.DataFrame:
+if TYPE_CHECKING:
+    import pandas as pd
+
+NS_PER_SECOND = 1_000_000_000
+NAT_NS = np.iinfo(np.int64).min  # NaT as an int64 nanosecond count
+
+
+def grouped_mean(
+    keys: np.ndarray,
+    columns: Mapping[str, np.ndarray],
+    backend: Optional[str] = None,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Mean of each column per key, skipping NaN values.
+
+    The engine is picked by ``analytics.backends.select_backend`` unless
+    ``backend`` names one.
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, np.ndarray]]: Sorted unique keys and the
+        per-key means of every column.
+    """
+    for values in columns.values():
+        if len(values) != len(keys):
+            raise ValueError("All columns must have the same length as keys")
+    return select_backend(keys, backend).grouped_mean(keys, columns)
+
+
+def resample_mean(
+    timestamps_ns: np.ndarray,
+    columns: Mapping[str, np.ndarray],
+    bucket_seconds: int = 60,
+    backend: Optional[str] = None,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Average readings into fixed time buckets without pandas.
+
+    Buckets are aligned to multiples of ``bucket_seconds`` since the epoch
+    and cover the whole span of the input, so buckets with no readings are
+    present with NaN values (as with ``DataFrame.resample().mean()``).
+    Readings stamped NaT (``NAT_NS``) are skipped, as pandas does.
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, np.ndarray]]: Bucket start times in
+        nanoseconds and the per-bucket means of every column.
+    """
+    if bucket_seconds <= 0:
+        raise ValueError("bucket_seconds must be positive")
+    timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+    valid = timestamps_ns != NAT_NS
+    if not valid.all():
+        timestamps_ns = timestamps_ns[valid]
+        columns = {name: np.asarray(values)[valid] for name, values in columns.items()}
+    if len(timestamps_ns) == 0:
+        return timestamps_ns, {name: np.empty(0) for name in columns}
+
+    width = bucket_seconds * NS_PER_SECOND
+    buckets = timestamps_ns // width
+    first = int(buckets.min())
+    keys, means = grouped_mean(buckets - first, columns, backend)
+
+    span = int(keys[-1]) + 1
+    starts = (first + np.arange(span, dtype=np.int64)) * width
+    dense: Dict[str, np.ndarray] = {}
+    for name, values in means.items():
+        filled = np.full(span, np.nan)
+        filled[keys] = values
+        dense[name] = filled
+    return starts, dense
+
+
+def resample_per_minute(df: "pd.DataFrame", backend: Optional[str] = None) -> "pd.DataFrame":
     """
     Resample per-second sensor data to per-minute averages.
 
@@ -15,9 +87,15 @@ def resample_per_minute(df: pd.DataFrame) -> pd.DataFrame:
     - A DateTimeIndex
     - Columns: temperature, humidity, co2
 
+    The aggregation runs on the engine chosen by ``grouped_mean`` (pure
+    NumPy unless a columnar engine is selected); pandas is only used to
+    unpack the input and build the result.
+
     Returns:
         pd.DataFrame: Resampled per-minute averages.
     """
+    import pandas as pd
+
     if not isinstance(df.index, pd.DatetimeIndex):
         raise TypeError("DataFrame index must be a pandas.DatetimeIndex")
 
@@ -25,9 +103,39 @@ def resample_per_minute(df: pd.DataFrame) -> pd.DataFrame:
     if not required_columns.issubset(df.columns):
         raise ValueError(f"DataFrame must contain columns: {required_columns}")
 
-    return df.resample("1min").mean()
-
-
+    numeric = all(pd.api.types.is_numeric_dtype(dtype) for dtype in df.dtypes)
+    if df.empty or not numeric or df.index.isna().all():
+        return df.resample("1min").mean()
+
+    index = df.index
+    unit = getattr(index, "unit", "ns")  # pandas 2 indexes may count s, ms or us
+    if unit != "ns":
+        try:
+            index = index.as_unit("ns")
+        except (OverflowError, pd.errors.OutOfBoundsDatetime):  # outside the ns range
+            return df.resample("1min").mean()
+    # Minute buckets are the same in UTC and in any whole-minute UTC offset
+    timestamps = index.tz_convert("UTC").asi8 if index.tz is not None else index.asi8
+    starts, means = resample_mean(
+        timestamps, {name: df[name].to_numpy() for name in df.columns}, 60, backend
+    )
+
+    first = pd.Timestamp(int(starts[0]), tz="UTC" if index.tz is not None else None)
+    if index.tz is not None:
+        first = first.tz_convert(index.tz)
+    result_index = pd.date_range(first, periods=len(starts), freq="min", name=index.name)
+    if unit != "ns":
+        result_index = result_index.as_unit(unit)
+    return pd.DataFrame(
+        {
+            name: values.astype(df[name].dtype, copy=False) if df[name].dtype.kind == "f" else values
+            for name, values in means.items()
+        },
+        index=result_index,
+    )
+
+
+@timed("analytics")
 def calculate_heatmap_index(
     temperature: np.ndarray,
     humidity: np.ndarray,
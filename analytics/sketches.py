@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+_U64 = np.uint64
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """
+    Vectorized SplitMix64 finalizer (uint64 arithmetic wraps as intended).
+    """
+    with np.errstate(over="ignore"):
+        x = x + _U64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> _U64(30))) * _U64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> _U64(27))) * _U64(0x94D049BB133111EB)
+        return x ^ (x >> _U64(31))
+
+
+def hash64(values: Sequence) -> np.ndarray:
+    """
+    Stable 64-bit hashes of integers or strings/bytes, computed column-wise
+    over fixed-width byte views rather than per item. Unlike ``hash()`` the
+    result does not depend on the process, so sketches built on different
+    shards can be merged.
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in "iu":
+        return _splitmix64(array.astype(np.uint64))
+    if array.dtype.kind == "U":
+        try:
+            array = array.astype("S")  # ASCII (sensor IDs): a single C-level cast
+        except UnicodeEncodeError:
+            array = np.char.encode(array, "utf-8")
+    elif array.dtype.kind != "S":
+        array = np.asarray([str(v).encode("utf-8") for v in array])
+
+    width = max(8, -(-array.dtype.itemsize // 8) * 8)
+    padded = np.zeros(len(array), dtype=f"S{width}")
+    padded[:] = array
+    words = padded.view(np.uint64).reshape(len(array), width // 8)
+    # All-NUL words are padding; skipping them makes the hash independent of
+    # the array's itemsize (b"DEV-1" hashes the same in S5 and S16 arrays).
+    h = np.zeros(len(array), dtype=np.uint64)
+    for column in range(words.shape[1]):
+        word = words[:, column]
+        h = np.where(word != 0, _splitmix64(h ^ word), h)
+    return _splitmix64(h)
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch with rank error about ``1.7 / k`` (k=200: under 1%).
+
+    Items live in levels of compactors; an item at level h stands for 2**h
+    raw values. When a level exceeds its capacity it is sorted and every
+    other item (random offset) is promoted, so memory stays around ``3 * k``
+    floats however many values are added. Updates and compactions operate on
+    whole arrays, and two sketches with the same ``k`` merge level by level.
+    """
+
+    C = 2.0 / 3.0  # capacity decay per level below the top
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None) -> None:
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def for_error(cls, rank_error: float, seed: Optional[int] = None) -> "KLLSketch":
+        """
+        Sketch sized for a target rank error (e.g. 0.01 for +-1 percentile).
+        """
+        if not 0 < rank_error < 1:
+            raise ValueError("rank_error must be within (0, 1)")
+        return cls(max(8, math.ceil(1.7 / rank_error)), seed)
+
+    @property
+    def rank_error(self) -> float:
+        return 1.7 / self.k
+
+    @property
+    def retained(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * self.C ** depth)))
+
+    def update(self, values: Iterable[float]) -> None:
+        """
+        Add a batch of values (NaN/inf are ignored).
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+
+    def _compress(self) -> None:
+        # Adding a level lowers every capacity below it, so sweep again
+        # until a pass leaves the number of levels unchanged.
+        while True:
+            height = len(self.levels)
+            for level in range(height):
+                items = self.levels[level]
+                if len(items) <= self._capacity(level):
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so weights are conserved exactly
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[: len(items) - len(keep)]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+            if len(self.levels) == height:
+                return
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """
+        Fold ``other`` into this sketch (in place) and return self.
+        """
+        if other.k != self.k:
+            raise ValueError("Can only merge KLL sketches with the same k")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            if len(items):
+                self.levels[level] = np.concatenate((self.levels[level], items))
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """
+        Approximate values at quantiles ``qs`` (each within [0, 1]).
+        NaN for an empty sketch.
+        """
+        qs = np.asarray(qs, dtype=np.float64)
+        if np.any((qs < 0) | (qs > 1)):
+            raise ValueError("Quantiles must be within [0, 1]")
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level), 2 ** h, dtype=np.int64) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        targets = qs * cumulative[-1]
+        positions = np.searchsorted(cumulative, targets, side="left")
+        return items[np.minimum(positions, len(items) - 1)]
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch: ``2**precision`` one-byte registers, relative
+    standard error ``1.04 / sqrt(2**precision)`` (precision 12: 4 KiB, ~1.6%).
+
+    Items are hashed with ``hash64``, so registers built in different
+    processes merge with an element-wise max.
+    """
+
+    def __init__(self, precision: int = 12) -> None:
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be within [4, 18]")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def for_error(cls, relative_error: float) -> "HyperLogLog":
+        if not 0 < relative_error < 1:
+            raise ValueError("relative_error must be within (0, 1)")
+        precision = math.ceil(math.log2((1.04 / relative_error) ** 2))
+        return cls(min(18, max(4, precision)))
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, items: Sequence) -> None:
+        """
+        Add a batch of items (integers, strings or bytes).
+        """
+        if not len(items):
+            return
+        self.update_hashes(hash64(items))
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        p = self.precision
+        index = (hashes >> _U64(64 - p)).astype(np.intp)
+        rest = hashes & _U64((1 << (64 - p)) - 1)
+        # Rank = position of the lowest set bit; isolating it gives an exact
+        # power of two, so log2 is exact in float64.
+        lowest = rest & (~rest + _U64(1))
+        with np.errstate(divide="ignore"):
+            rank = np.where(rest == 0, 64 - p + 1, np.log2(lowest.astype(np.float64)) + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Can only merge HyperLogLogs with the same precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1.0 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # linear counting for small cardinalities
+        return estimate
+
+
+class GroupSketches:
+    """
+    Per-group (e.g. per-district) quantile sketches for several metrics plus
+    a distinct-sensor counter, updated from columnar batches.
+
+    A batch is split by group once (one sort), then each group's sketches
+    take their slice as arrays. ``merge`` combines the results of shards or
+    of consecutive time windows.
+    """
+
+    def __init__(
+        self,
+        metrics: Sequence[str] = ("temperature_celsius", "co2_ppm"),
+        k: int = 200,
+        precision: int = 12,
+    ) -> None:
+        self.metrics = tuple(metrics)
+        self.k = k
+        self.precision = precision
+        self.quantile_sketches: Dict[str, Dict[str, KLLSketch]] = {}
+        self.distinct_sensors: Dict[str, HyperLogLog] = {}
+
+    def _sketches(self, group: str) -> Dict[str, KLLSketch]:
+        sketches = self.quantile_sketches.get(group)
+        if sketches is None:
+            sketches = self.quantile_sketches[group] = {m: KLLSketch(self.k) for m in self.metrics}
+            self.distinct_sensors[group] = HyperLogLog(self.precision)
+        return sketches
+
+    def update(
+        self,
+        groups: Sequence[str],
+        sensor_ids: Sequence,
+        columns: Mapping[str, np.ndarray],
+    ) -> None:
+        """
+        Add a batch: ``groups[i]`` and ``sensor_ids[i]`` describe row i of
+        every array in ``columns`` (which must hold all ``metrics``).
+        """
+        groups = np.asarray(groups)
+        if not len(groups):
+            return
+        names, inverse = np.unique(groups, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(names) + 1))
+        hashes = hash64(sensor_ids)[order]
+        values = {m: np.asarray(columns[m], dtype=np.float64)[order] for m in self.metrics}
+
+        for position, name in enumerate(names.tolist()):
+            rows = slice(bounds[position], bounds[position + 1])
+            sketches = self._sketches(name)
+            for metric in self.metrics:
+                sketches[metric].update(values[metric][rows])
+            self.distinct_sensors[name].update_hashes(hashes[rows])
+
+    def merge(self, other: "GroupSketches") -> "GroupSketches":
+        if (other.metrics, other.k, other.precision) != (self.metrics, self.k, self.precision):
+            raise ValueError("Can only merge GroupSketches with the same configuration")
+        for group, sketches in other.quantile_sketches.items():
+            mine = self._sketches(group)
+            for metric, sketch in sketches.items():
+                mine[metric].merge(sketch)
+            self.distinct_sensors[group].merge(other.distinct_sensors[group])
+        return self
+
+    def summary(self, group: str, qs: Sequence[float] = (0.5, 0.95, 0.99)) -> Dict[str, float]:
+        """
+        Quantiles of every metric for ``group`` (keys like
+        ``"co2_ppm_p95"``) and its approximate distinct sensor count.
+
+        Raises:
+            KeyError: If no readings were seen for ``group``.
+        """
+        sketches = self.quantile_sketches[group]
+        result: Dict[str, float] = {}
+        for metric in self.metrics:
+            for q, value in zip(qs, sketches[metric].quantiles(qs)):
+                result[f"{metric}_p{q * 100:g}"] = float(value)
+        result["distinct_sensors"] = round(self.distinct_sensors[group].count())
+        return result
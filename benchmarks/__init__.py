@@ -0,0 +1,8 @@
+"""
+Benchmarks for CityPulse IoT.
+
+Includes:
+- startup.py: Cold-start import cost measured with ``python -X importtime``
+- harness.py: Timing, percentiles, JSON results and baseline comparison
+- cases.py: Hot-path benchmark cases (polling, analytics, security, events, cache)
+"""
@@ -0,0 +1,79 @@
+"""
+Run the benchmark suite.
+
+    python -m benchmarks                                # run and write bench_results.json
+    python -m benchmarks --save-baseline                # also store results as the baseline
+    python -m benchmarks --baseline benchmarks/baseline.json --threshold 0.2
+
+Exits with status 1 when any case is slower than the baseline by more than
+the threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+from typing import Sequence
+
+import benchmarks.cases  # noqa: F401  (registers cases)
+from benchmarks.harness import compare, load_results, registered_cases, run_cases, save_results
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("names", nargs="*", help="Cases to run (default: all)")
+    parser.add_argument("--list", action="store_true", help="List cases and exit")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed fractional slowdown of p50 vs baseline")
+    parser.add_argument("--save-baseline", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    if args.list:
+        for name in registered_cases():
+            print(name)
+        return 0
+
+    results = run_cases(args.names or None, warmup=args.warmup, repeats=args.repeats)
+
+    print(f"{'case':<30}{'p50':>12}{'p95':>12}{'p99':>12}{'items/s':>14}")
+    for result in results:
+        print(
+            f"{result.name:<30}{result.p50 * 1e6:>10.1f}us{result.p95 * 1e6:>10.1f}us"
+            f"{result.p99 * 1e6:>10.1f}us{result.throughput:>14,.0f}"
+        )
+
+    save_results(results, args.output)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; skipping regression check.")
+        return 0
+
+    regressions = compare(results, load_results(args.baseline), threshold=args.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression.name}: {regression.baseline * 1e6:.1f}us -> "
+            f"{regression.current * 1e6:.1f}us ({regression.ratio:.2f}x)"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
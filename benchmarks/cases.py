@@ -0,0 +1,271 @@
+"""
+Benchmark cases for CityPulse hot paths.
+
+Each case is registered with ``@benchmark`` and yields the callable to time;
+setup and teardown stay outside the measured region. ``items`` is sensors,
+rows, subscribers, lookups or bytes per call depending on the case.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator
+
+from analytics.backends import available_backends
+from benchmarks.harness import benchmark
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SECTOR_SIZES = (10, 100, 1_000)
+HEATMAP_ROWS = (1_000, 100_000, 1_000_000)
+RESAMPLE_SECONDS = (3_600, 86_400)
+GROUPED_MEAN_ROWS = (1_000, 100_000, 1_000_000)
+GROUPED_MEAN_KEYS = 1_000
+SKETCH_ROWS = (1_000, 100_000)
+FANOUT_SUBSCRIBERS = (1, 10, 100)
+CACHE_LOOKUPS = 1_000
+
+
+def _register_poll_sector(size: int) -> None:
+    @benchmark(f"poll_sector[{size}]", items=size)
+    @contextmanager
+    def case() -> Iterator[Callable[[], object]]:
+        from ingestion.stream import poll_sector
+
+        sensor_ids = [f"SENSOR-{i}" for i in range(size)]
+        loop = asyncio.new_event_loop()
+        try:
+            yield lambda: loop.run_until_complete(poll_sector(sensor_ids, delay_seconds=0))
+        finally:
+            loop.close()
+
+
+def _register_heatmap(rows: int) -> None:
+    @benchmark(f"heatmap_index[{rows}]", items=rows)
+    @contextmanager
+    def case() -> Iterator[Callable[[], object]]:
+        import numpy as np
+
+        from analytics.processor import calculate_heatmap_index
+
+        rng = np.random.default_rng(0)
+        temperature = rng.uniform(10, 50, size=rows)
+        humidity = rng.uniform(10, 90, size=rows)
+        co2 = rng.uniform(300, 2000, size=rows)
+        yield lambda: calculate_heatmap_index(temperature, humidity, co2)
+
+
+def _resample_frame(seconds: int) -> "pd.DataFrame":
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2024-01-01", periods=seconds, freq="s")
+    return pd.DataFrame(
+        {
+            "temperature": rng.uniform(10, 50, size=seconds),
+            "humidity": rng.uniform(10, 90, size=seconds),
+            "co2": rng.uniform(300, 2000, size=seconds),
+        },
+        index=index,
+    )
+
+
+def _register_resample(seconds: int) -> None:
+    @benchmark(f"resample_per_minute[{seconds}]", items=seconds)
+    @contextmanager
+    def case() -> Iterator[Callable[[], object]]:
+        from analytics.processor import resample_per_minute
+
+        df = _resample_frame(seconds)
+        yield lambda: resample_per_minute(df)
+
+    @benchmark(f"pandas_resample[{seconds}]", items=seconds)
+    @contextmanager
+    def baseline() -> Iterator[Callable[[], object]]:
+        # pandas' own resampler, which resample_per_minute used to call
+        df = _resample_frame(seconds)
+        yield lambda: df.resample("1min").mean()
+
+
+def _register_resample_engine(backend: str, seconds: int) -> None:
+    @benchmark(f"resample_mean[{backend},{seconds}]", items=seconds)
+    @contextmanager
+    def case() -> Iterator[Callable[[], object]]:
+        import numpy as np
+
+        from analytics.processor import resample_mean
+
+        rng = np.random.default_rng(0)
+        timestamps = np.arange(seconds, dtype=np.int64) * 1_000_000_000
+        columns = {
+            "temperature": rng.uniform(10, 50, size=seconds),
+            "humidity": rng.uniform(10, 90, size=seconds),
+            "co2": rng.uniform(300, 2000, size=seconds),
+        }
+        yield lambda: resample_mean(timestamps, columns, 60, backend)
+
+
+def _register_grouped_mean(backend: str, rows: int) -> None:
+    @benchmark(f"grouped_mean[{backend},{rows}]", items=rows)
+    @contextmanager
+    def case() -> Iterator[Callable[[], object]]:
+        import numpy as np
+
+        from analytics.processor import grouped_mean
+
+        rng = np.random.default_rng(0)
+        keys = rng.integers(0, GROUPED_MEAN_KEYS, size=rows)  # unsorted, e.g. sensor IDs
+        columns = {"temperature": rng.uniform(10, 50, size=rows)}
+        yield lambda: grouped_mean(keys, columns, backend)
+
+
+def _register_sketch_update(rows: int) -> None:
+    @benchmark(f"group_sketches_update[{rows}]", items=rows)
+    @contextmanager
+    def case() -> Iterator[Callable[[], object]]:
+        import numpy as np
+
+        from analytics.sketches import GroupSketches
+
+        rng = np.random.default_rng(0)
+        districts = rng.choice(np.array(["north", "south", "east", "west"]), size=rows)
+        sensor_ids = np.char.add(b"SENSOR-", rng.integers(0, 10_000, size=rows).astype("S"))
+        columns = {
+            "temperature_celsius": rng.uniform(10, 50, size=rows),
+            "co2_ppm": rng.uniform(300, 2000, size=rows),
+        }
+        sketches = GroupSketches()
+        yield lambda: sketches.update(districts, sensor_ids, columns)
+
+
+def _register_fanout(subscribers: int) -> None:
+    @benchmark(f"event_fanout[{subscribers}]", items=subscribers)
+    @contextmanager
+    def case() -> Iterator[Callable[[], object]]:
+        from core.events import EmergencyResponseSystem
+
+        class _NullSubscriber:
+            def notify(self, message: str) -> None:
+                pass
+
+        system = EmergencyResponseSystem()
+        for _ in range(subscribers):
+            system.subscribe(_NullSubscriber())
+        yield lambda: system.notify_all("FIRE ALERT from BENCH: 99.00 °C")
+
+
+for _size in SECTOR_SIZES:
+    _register_poll_sector(_size)
+for _rows in HEATMAP_ROWS:
+    _register_heatmap(_rows)
+for _seconds in RESAMPLE_SECONDS:
+    _register_resample(_seconds)
+# One case per installed engine, so results compare them side by side
+for _backend in available_backends():
+    for _seconds in RESAMPLE_SECONDS:
+        _register_resample_engine(_backend, _seconds)
+    for _rows in GROUPED_MEAN_ROWS:
+        _register_grouped_mean(_backend, _rows)
+for _rows in SKETCH_ROWS:
+    _register_sketch_update(_rows)
+for _subscribers in FANOUT_SUBSCRIBERS:
+    _register_fanout(_subscribers)
+
+
+@benchmark("sha256[1KiB]", items=1024)
+@contextmanager
+def sha256_small() -> Iterator[Callable[[], object]]:
+    from security.encryption import generate_sha256
+
+    payload = b"x" * 1024
+    yield lambda: generate_sha256(payload)
+
+
+@benchmark("sha256[1MiB]", items=1024 * 1024)
+@contextmanager
+def sha256_large() -> Iterator[Callable[[], object]]:
+    from security.encryption import generate_sha256
+
+    payload = b"x" * (1024 * 1024)
+    yield lambda: generate_sha256(payload)
+
+
+@benchmark("fernet_encrypt[1KiB]", items=1024)
+@contextmanager
+def fernet_encrypt() -> Iterator[Callable[[], object]]:
+    from security.encryption import encrypt_data, generate_fernet_key
+
+    key = generate_fernet_key()
+    payload = b"x" * 1024
+    yield lambda: encrypt_data(payload, key)
+
+
+@benchmark("fernet_decrypt[1KiB]", items=1024)
+@contextmanager
+def fernet_decrypt() -> Iterator[Callable[[], object]]:
+    from security.encryption import decrypt_data, encrypt_data, generate_fernet_key
+
+    key = generate_fernet_key()
+    token = encrypt_data(b"x" * 1024, key)
+    yield lambda: decrypt_data(token, key)
+
+
+@benchmark("sensor_cache_hit", items=CACHE_LOOKUPS)
+@contextmanager
+def sensor_cache_hit() -> Iterator[Callable[[], object]]:
+    from analytics.memory_manager import SensorCache
+
+    class _Sensor:
+        pass
+
+    cache = SensorCache()
+    sensors = [_Sensor() for _ in range(CACHE_LOOKUPS)]
+    keys = [f"SENSOR-{i}" for i in range(CACHE_LOOKUPS)]
+    for key, sensor in zip(keys, sensors):
+        cache.add(key, sensor)
+
+    def lookup_all() -> None:
+        get = cache.get
+        for key in keys:
+            get(key)
+
+    yield lookup_all
+    cache.clear()
+
+
+@benchmark("sensor_cache_miss", items=CACHE_LOOKUPS)
+@contextmanager
+def sensor_cache_miss() -> Iterator[Callable[[], object]]:
+    from analytics.memory_manager import SensorCache
+
+    cache = SensorCache()
+    keys = [f"MISSING-{i}" for i in range(CACHE_LOOKUPS)]
+
+    def lookup_all() -> None:
+        get = cache.get
+        for key in keys:
+            get(key)
+
+    yield lookup_all
+
+
+@benchmark("gateway_parse_binary[1000]", items=1_000)
+@contextmanager
+def gateway_parse_binary() -> Iterator[Callable[[], object]]:
+    from ingestion.gateway import ReadingBatch, encode_records
+    from service.pipeline import analyze_batch
+
+    payload = encode_records([(f"DEV-{i}", i, 0.0, 50.0, 40.0, 800.0) for i in range(1_000)])
+    yield lambda: analyze_batch(ReadingBatch.from_buffer(payload))
+
+
+@benchmark("gateway_parse_lines[1000]", items=1_000)
+@contextmanager
+def gateway_parse_lines() -> Iterator[Callable[[], object]]:
+    from ingestion.gateway import parse_lines
+
+    payload = "".join(f"DEV-{i},{i},0.0,50.0,40.0,800.0\n" for i in range(1_000)).encode()
+    yield lambda: parse_lines(payload)
@@ -0,0 +1,222 @@
+"""
+Benchmark harness: timing, percentiles, result files and baseline checks.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import time
+from contextlib import AbstractContextManager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CaseFactory = Callable[[], "AbstractContextManager[Callable[[], object]]"]
+
+# Registered as {name: (factory, items_per_call)}; filled by the @benchmark decorator.
+_CASES: Dict[str, Tuple[CaseFactory, int]] = {}
+
+
+def benchmark(name: str, items: int = 1) -> Callable[[CaseFactory], CaseFactory]:
+    """
+    Register a benchmark case.
+
+    The decorated function must be a context manager factory that performs
+    any setup, yields the zero-argument callable to time and cleans up
+    afterwards. ``items`` is the number of logical operations per call and
+    is used to report throughput.
+    """
+    if items <= 0:
+        raise ValueError("items must be positive")
+
+    def decorator(factory: CaseFactory) -> CaseFactory:
+        if name in _CASES:
+            raise ValueError(f"Duplicate benchmark name: {name}")
+        _CASES[name] = (factory, items)
+        return factory
+
+    return decorator
+
+
+def registered_cases() -> Dict[str, Tuple[CaseFactory, int]]:
+    return dict(_CASES)
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Timing summary for one case. All times are seconds per call.
+    """
+
+    name: str
+    items: int
+    loops: int
+    samples: List[float] = field(repr=False)
+    p50: float = 0.0
+    p95: float = 0.0
+    p99: float = 0.0
+    mean: float = 0.0
+    minimum: float = 0.0
+
+    def __post_init__(self) -> None:
+        if not self.samples:
+            raise ValueError("samples must not be empty")
+        self.p50 = percentile(self.samples, 50)
+        self.p95 = percentile(self.samples, 95)
+        self.p99 = percentile(self.samples, 99)
+        self.mean = sum(self.samples) / len(self.samples)
+        self.minimum = min(self.samples)
+
+    @property
+    def throughput(self) -> float:
+        """Items per second at the median."""
+        return self.items / self.p50 if self.p50 > 0 else float("inf")
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Linear-interpolated percentile (same definition as ``numpy.percentile``).
+    """
+    if not values:
+        raise ValueError("values must not be empty")
+    if not 0 <= pct <= 100:
+        raise ValueError("pct must be within [0, 100]")
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _calibrate(fn: Callable[[], object], min_sample_seconds: float) -> int:
+    """
+    Pick a loop count so that one sample takes at least ``min_sample_seconds``.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_sample_seconds or loops >= 1_000_000:
+            return loops
+        loops *= 10 if elapsed < min_sample_seconds / 10 else 2
+
+
+def measure(
+    name: str,
+    fn: Callable[[], object],
+    items: int = 1,
+    warmup: int = 3,
+    repeats: int = 20,
+    min_sample_seconds: float = 0.005,
+) -> BenchmarkResult:
+    """
+    Time ``fn`` after ``warmup`` untimed calls.
+
+    Each of the ``repeats`` samples runs ``fn`` enough times to last at least
+    ``min_sample_seconds`` and records the mean time per call. GC is
+    disabled while sampling to keep collections out of the numbers.
+    """
+    if repeats <= 0:
+        raise ValueError("repeats must be positive")
+
+    for _ in range(warmup):
+        fn()
+
+    loops = _calibrate(fn, min_sample_seconds)
+    samples: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return BenchmarkResult(name=name, items=items, loops=loops, samples=samples)
+
+
+def run_cases(
+    names: Iterable[str] | None = None,
+    warmup: int = 3,
+    repeats: int = 20,
+    min_sample_seconds: float = 0.005,
+) -> List[BenchmarkResult]:
+    """
+    Run registered cases (all of them when ``names`` is None).
+    """
+    cases = registered_cases()
+    selected = list(cases) if names is None else list(names)
+    unknown = [name for name in selected if name not in cases]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {unknown}")
+
+    results: List[BenchmarkResult] = []
+    for name in selected:
+        factory, items = cases[name]
+        with factory() as fn:
+            results.append(measure(name, fn, items, warmup, repeats, min_sample_seconds))
+    return results
+
+
+def save_results(results: Sequence[BenchmarkResult], path: str) -> None:
+    """
+    Write results (including raw samples) plus machine info as JSON.
+    """
+    payload = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {result.name: asdict(result) for result in results},
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path, "r", encoding="utf-8") as handle:
+        payload = json.load(handle)
+    return payload["results"]
+
+
+def compare(
+    results: Sequence[BenchmarkResult],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = 0.2,
+    metric: str = "p50",
+) -> List[Regression]:
+    """
+    Cases whose ``metric`` is more than ``threshold`` (fractional) slower than
+    the baseline. Cases missing from the baseline are ignored.
+    """
+    if threshold < 0:
+        raise ValueError("threshold must be non-negative")
+
+    regressions: List[Regression] = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None:
+            continue
+        base_value = reference[metric]
+        current = getattr(result, metric)
+        if base_value > 0 and current > base_value * (1 + threshold):
+            regressions.append(Regression(result.name, base_value, current))
+    return regressions
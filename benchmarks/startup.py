@@ -0,0 +1,103 @@
+"""
+Cold-start import benchmark.
+
+Runs each target in a fresh interpreter with ``-X importtime`` and reports
+the cumulative import time of the target plus the heavy third-party
+libraries that ended up loaded.
+
+    python -m benchmarks.startup
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Sequence, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGETS: Tuple[str, ...] = (
+    "ingestion",
+    "ingestion.__main__",
+    "sensors",
+    "analytics",
+    "security",
+    "main",
+)
+
+HEAVY_MODULES: Tuple[str, ...] = ("numpy", "pandas", "cryptography")
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Parse ``-X importtime`` output into {module: cumulative_microseconds}.
+
+    Lines look like ``import time:   self [us] |  cumulative | imported package``.
+    """
+    cumulative: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            value = int(parts[1].strip())
+        except ValueError:
+            continue  # header line
+        cumulative[parts[2].strip()] = value
+    return cumulative
+
+
+def measure_import(module: str) -> Dict[str, int]:
+    """
+    Import ``module`` in a fresh interpreter and return its importtime table.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def run(targets: Sequence[str] = DEFAULT_TARGETS, repeats: int = 5) -> List[Dict[str, object]]:
+    """
+    Measure each target ``repeats`` times.
+
+    Returns:
+        List[Dict[str, object]]: One row per target with the median
+        cumulative import time (ms) and which heavy modules were loaded.
+    """
+    if repeats <= 0:
+        raise ValueError("repeats must be positive")
+
+    rows: List[Dict[str, object]] = []
+    for target in targets:
+        samples: List[int] = []
+        loaded: List[str] = []
+        for _ in range(repeats):
+            table = measure_import(target)
+            samples.append(table.get(target, 0))
+            loaded = [name for name in HEAVY_MODULES if name in table]
+        rows.append({
+            "target": target,
+            "median_ms": statistics.median(samples) / 1000,
+            "heavy_modules": loaded,
+        })
+    return rows
+
+
+def main() -> None:
+    print(f"{'target':<22}{'median ms':>12}  heavy modules loaded")
+    for row in run():
+        heavy = ", ".join(row["heavy_modules"]) or "-"  # type: ignore[arg-type]
+        print(f"{row['target']:<22}{row['median_ms']:>12.2f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,99 @@
 from __future__ import annotations
-from typing import Any, Dict
+
+import json
+import os
+import signal
+import threading
+import weakref
+from collections import deque
+from dataclasses import dataclass, field, fields, replace
+from types import MappingProxyType
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, List, Mapping, Tuple
+
+
+ConfigListener = Callable[["ConfigSnapshot", "ConfigSnapshot"], None]
+
+
+def _freeze(mapping: Mapping[str, Any]) -> Mapping[str, Any]:
+    return MappingProxyType(dict(mapping))
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Immutable view of the grid configuration at one point in time.
+
+    Readers hold on to a snapshot (or re-read ``GridConfig().snapshot``)
+    instead of looking keys up in a shared dict; updates never mutate an
+    existing snapshot, they publish a new one.
+    """
+
+    api_endpoint: str = "https://api.citypulse.local"
+    fire_threshold_celsius: float = 80.0
+    zone_fire_thresholds: Mapping[str, float] = field(default_factory=lambda: _freeze({}))
+    extras: Mapping[str, Any] = field(default_factory=lambda: _freeze({}))
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "fire_threshold_celsius", float(self.fire_threshold_celsius))
+        object.__setattr__(
+            self,
+            "zone_fire_thresholds",
+            _freeze({str(k): float(v) for k, v in self.zone_fire_thresholds.items()}),
+        )
+        object.__setattr__(self, "extras", _freeze(self.extras))
+
+    def get(self, key: str) -> Any:
+        if key in _FIELD_NAMES:
+            return getattr(self, key)
+        return self.extras.get(key)
+
+    def fire_threshold_for(self, zone: str | None) -> float:
+        """
+        Fire threshold for a zone, falling back to the grid-wide value.
+        """
+        if zone is None:
+            return self.fire_threshold_celsius
+        return self.zone_fire_thresholds.get(zone, self.fire_threshold_celsius)
+
+    def with_values(self, values: Mapping[str, Any]) -> "ConfigSnapshot":
+        """
+        Return a new snapshot with ``values`` applied on top of this one.
+        Unknown keys are kept in ``extras``.
+        """
+        typed = {k: v for k, v in values.items() if k in _FIELD_NAMES and k != "extras"}
+        extra = {k: v for k, v in values.items() if k not in _FIELD_NAMES}
+        if extra:
+            typed["extras"] = {**self.extras, **extra}
+        return replace(self, **typed)
+
+    def changed_keys(self, other: "ConfigSnapshot") -> FrozenSet[str]:
+        """
+        Keys whose values differ between this snapshot and ``other``.
+        """
+        changed = {
+            name for name in _FIELD_NAMES
+            if name != "extras" and getattr(self, name) != getattr(other, name)
+        }
+        for key in set(self.extras) | set(other.extras):
+            if self.extras.get(key) != other.extras.get(key):
+                changed.add(key)
+        return frozenset(changed)
+
+
+_FIELD_NAMES: FrozenSet[str] = frozenset(f.name for f in fields(ConfigSnapshot))
 
 
 class GridConfig:
     """
     Singleton configuration manager for the CityPulse grid.
+
+    The current configuration is held as an immutable ``ConfigSnapshot``
+    that is swapped with a single attribute assignment, so readers never
+    take a lock. Writers are serialized and notify subscribers whose keys
+    changed. Notifications are delivered one at a time in publish order,
+    even with concurrent writers or a subscriber that writes itself, so a
+    subscriber's last call always carries the snapshot in effect; a
+    subscriber that raises does not stop the others.
     """
 
     _instance: "GridConfig | None" = None
@@ -16,12 +105,229 @@ class GridConfig:
 
     def __new__(cls) -> "GridConfig":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._config = dict(cls.DEFAULTS)
+            instance = super().__new__(cls)
+            instance.snapshot = ConfigSnapshot().with_values(cls.DEFAULTS)
+            instance._write_lock = threading.Lock()
+            instance._notify_lock = threading.Lock()
+            instance._pending = deque()
+            instance._deliverer = None
+            instance._listeners = []
+            cls._instance = instance
         return cls._instance
 
+    snapshot: ConfigSnapshot
+    _write_lock: threading.Lock
+    _notify_lock: threading.Lock  # held by the thread delivering notifications
+    _pending: Deque[Tuple[ConfigSnapshot, ConfigSnapshot]]  # published, not yet delivered
+    _deliverer: int | None
+    _listeners: List[Tuple[FrozenSet[str] | None, Callable[[], ConfigListener | None]]]
+
     def get(self, key: str) -> Any:
-        return self._config.get(key)
+        return self.snapshot.get(key)
 
     def set(self, key: str, value: Any) -> None:
-        self._config[key] = value
+        self.update({key: value})
+
+    def update(self, values: Mapping[str, Any]) -> ConfigSnapshot:
+        """
+        Atomically apply several values and publish a new snapshot.
+
+        Returns:
+            ConfigSnapshot: The snapshot now in effect.
+        """
+        return self._publish(lambda old: old.with_values(values))
+
+    def reset(self) -> None:
+        """
+        Restore the defaults. Subscribers are notified as for any update.
+        """
+        self._publish(lambda old: ConfigSnapshot().with_values(self.DEFAULTS))
+
+    def load_file(self, path: str) -> ConfigSnapshot:
+        """
+        Load a JSON config file layered over the defaults.
+
+        Raises:
+            ValueError: If the file does not contain a JSON object.
+        """
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+
+        if not isinstance(data, dict):
+            raise ValueError("Config file must contain a JSON object")
+
+        return self._publish(lambda old: ConfigSnapshot().with_values({**self.DEFAULTS, **data}))
+
+    def subscribe(
+        self,
+        callback: ConfigListener,
+        keys: Iterable[str] | None = None,
+    ) -> None:
+        """
+        Call ``callback(old, new)`` after updates that change any of ``keys``
+        (or any key, if ``keys`` is None).
+
+        Bound methods are held weakly so subscribing a sensor does not keep
+        it alive.
+        """
+        ref: Callable[[], ConfigListener | None]
+        if hasattr(callback, "__self__") and hasattr(callback, "__func__"):
+            ref = weakref.WeakMethod(callback)  # type: ignore[arg-type]
+        else:
+            ref = lambda: callback  # noqa: E731
+        watched = frozenset(keys) if keys is not None else None
+        with self._write_lock:
+            self._listeners.append((watched, ref))
+
+    def unsubscribe(self, callback: ConfigListener) -> None:
+        with self._write_lock:
+            self._listeners = [
+                (watched, ref) for watched, ref in self._listeners
+                if ref() not in (None, callback)
+            ]
+
+    def _publish(self, build: Callable[[ConfigSnapshot], ConfigSnapshot]) -> ConfigSnapshot:
+        with self._write_lock:
+            old = self.snapshot
+            new = build(old)
+            self.snapshot = new
+            self._pending.append((old, new))
+        self._deliver()
+        return new
+
+    def _deliver(self) -> None:
+        if self._deliverer == threading.get_ident():
+            return  # written from a callback: the loop below delivers it next
+        with self._notify_lock:
+            self._deliverer = threading.get_ident()
+            try:
+                while True:
+                    with self._write_lock:
+                        if not self._pending:
+                            return
+                        old, new = self._pending.popleft()
+                    self._notify(old, new)
+            finally:
+                self._deliverer = None
+
+    def _notify(self, old: ConfigSnapshot, new: ConfigSnapshot) -> None:
+        changed = new.changed_keys(old)
+        if not changed:
+            return
+
+        has_dead = False
+        for watched, ref in list(self._listeners):
+            callback = ref()
+            if callback is None:
+                has_dead = True
+            elif watched is None or watched & changed:
+                try:
+                    callback(old, new)
+                except Exception as exc:  # the swap already happened; tell everyone else
+                    print(f"[Config] Subscriber {callback!r} failed: {exc}")
+
+        if has_dead:
+            with self._write_lock:
+                self._listeners = [entry for entry in self._listeners if entry[1]() is not None]
+
+
+class ConfigFileWatcher:
+    """
+    Reloads ``GridConfig`` from a JSON file when its mtime changes.
+
+    ``poll()`` performs a single check and can be driven by any scheduler;
+    ``start()`` runs it on a daemon thread every ``interval_seconds``.
+    """
+
+    def __init__(self, path: str, interval_seconds: float = 2.0) -> None:
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self._config = GridConfig()
+        self._last_mtime: float | None = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._reload_requested = False
+        self._thread: threading.Thread | None = None
+
+    def poll(self, force: bool = False) -> bool:
+        """
+        Reload if the file changed since the last poll, or unconditionally
+        when ``force`` is set.
+
+        Returns:
+            bool: True if a reload happened.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return False
+
+        if mtime == self._last_mtime and not force:
+            return False
+
+        self._config.load_file(self.path)
+        self._last_mtime = mtime
+        return True
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def request_reload(self) -> None:
+        """
+        Make the watcher thread reload now, whether or not the file changed.
+
+        Only sets a flag and an event, so it is safe to call from a signal
+        handler: the reload itself (which takes ``GridConfig``'s write lock
+        and runs subscriber callbacks) happens on the watcher thread.
+        """
+        self._reload_requested = True
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            force, self._reload_requested = self._reload_requested, False
+            try:
+                self.poll(force)
+            except (OSError, ValueError) as exc:
+                print(f"[Config] Reload of {self.path} failed: {exc}")
+            self._wake.wait(self.interval_seconds)
+
+
+def install_sighup_reload(path: str, watcher: ConfigFileWatcher | None = None) -> bool:
+    """
+    Reload ``path`` into ``GridConfig`` whenever the process receives SIGHUP.
+
+    The handler only wakes ``watcher`` (a started ``ConfigFileWatcher`` for
+    ``path`` is created if none is given); the reload runs on the watcher
+    thread. Reloading inside the handler could deadlock on ``GridConfig``'s
+    write lock if the signal interrupted an ``update()`` on the main thread.
+
+    Returns:
+        bool: False on platforms without SIGHUP.
+    """
+    if not hasattr(signal, "SIGHUP"):
+        return False
+
+    if watcher is None:
+        watcher = ConfigFileWatcher(path)
+        watcher.start()
+
+    def _handler(signum: int, frame: Any) -> None:
+        watcher.request_reload()
+
+    signal.signal(signal.SIGHUP, _handler)
+    return True
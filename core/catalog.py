@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional, Set, cast
+
+import numpy as np
+
+from core.meta import SensorMeta
+
+HEALTH_STATES = ("unknown", "healthy", "unhealthy")
+
+_UNSET = object()
+
+
+@dataclass(frozen=True)
+class DeviceRecord:
+    device_id: str
+    sensor_type: str
+    zone: Optional[str]
+    health: str
+    last_seen: Optional[float]
+
+
+class _Index:
+    """
+    Secondary index: value -> set of catalog slots.
+    """
+
+    __slots__ = ("_slots",)
+
+    def __init__(self) -> None:
+        self._slots: Dict[Hashable, Set[int]] = {}
+
+    def add(self, value: Hashable, slot: int) -> None:
+        self._slots.setdefault(value, set()).add(slot)
+
+    def discard(self, value: Hashable, slot: int) -> bool:
+        """
+        Returns True if ``value`` no longer has any slots.
+        """
+        slots = self._slots.get(value)
+        if slots is None:
+            return False
+        slots.discard(slot)
+        if not slots:
+            del self._slots[value]
+            return True
+        return False
+
+    def get(self, value: Hashable) -> Set[int]:
+        return self._slots.get(value, set())
+
+    def counts(self) -> Dict[Hashable, int]:
+        return {value: len(slots) for value, slots in self._slots.items()}
+
+
+class DeviceCatalog:
+    """
+    Fleet inventory with secondary indexes by sensor type, zone, health and
+    last-seen time bucket.
+
+    Sensor types are checked against the ``SensorMeta`` registry, and a type
+    query also matches registered subclasses. Every change moves one device
+    between index entries in O(1). ``query`` walks the smallest matching
+    index entry and checks the other filters by set membership, so its cost
+    follows the size of the result rather than the fleet. Results are arrays
+    of device IDs in registration order.
+    """
+
+    def __init__(self, bucket_seconds: float = 60.0) -> None:
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        self.bucket_seconds = bucket_seconds
+        self._slots: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._types: List[Optional[str]] = []
+        self._zones: List[Optional[str]] = []
+        self._health: List[str] = []
+        self._last_seen: List[Optional[float]] = []
+        self._order: List[int] = []  # registration sequence; slots are reused after remove()
+        self._registrations = itertools.count()
+        self._free: List[int] = []
+
+        self._by_type = _Index()
+        self._by_zone = _Index()
+        self._by_health = _Index()
+        self._by_bucket = _Index()
+        self._buckets: List[int] = []  # sorted keys of _by_bucket (never-seen excluded)
+        self._never_seen: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, device_id: object) -> bool:
+        return device_id in self._slots
+
+    # -- updates --------------------------------------------------------------
+
+    def register(
+        self,
+        device_id: str,
+        sensor_type: str,
+        zone: object = _UNSET,
+        health: object = _UNSET,
+        last_seen: Optional[float] = None,
+    ) -> None:
+        """
+        Add a device, or update it if it is already registered.
+
+        A new device defaults to no zone and ``"unknown"`` health. For a
+        registered one only the arguments actually passed are changed, so
+        re-registering never clears a known zone or health state.
+
+        Raises:
+            ValueError: If ``sensor_type`` is not registered or ``health`` is invalid.
+        """
+        if not device_id:
+            raise ValueError("device_id must be a non-empty string")
+        if SensorMeta.lookup(sensor_type) is None:
+            raise ValueError(f"Unknown sensor type: {sensor_type}")
+        if device_id in self._slots:
+            self.update(device_id, sensor_type=sensor_type, zone=zone, health=health, last_seen=last_seen)
+            return
+        zone_name = cast(Optional[str], None if zone is _UNSET else zone)
+        health_state = cast(str, "unknown" if health is _UNSET else health)
+        self._check_health(health_state)
+
+        order = next(self._registrations)
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot], self._types[slot], self._zones[slot] = device_id, sensor_type, zone_name
+            self._health[slot], self._last_seen[slot], self._order[slot] = health_state, None, order
+        else:
+            slot = len(self._ids)
+            self._ids.append(device_id)
+            self._types.append(sensor_type)
+            self._zones.append(zone_name)
+            self._health.append(health_state)
+            self._last_seen.append(None)
+            self._order.append(order)
+        self._slots[device_id] = slot
+
+        self._by_type.add(sensor_type, slot)
+        self._by_zone.add(zone_name, slot)
+        self._by_health.add(health_state, slot)
+        self._never_seen.add(slot)
+        if last_seen is not None:
+            self._set_last_seen(slot, last_seen)
+
+    def register_sensor(self, sensor: object, health: object = _UNSET) -> None:
+        """
+        Register a sensor object (an ``AbstractSensor``) by its class and zone.
+        """
+        self.register(
+            getattr(sensor, "device_id"), type(sensor).__name__, getattr(sensor, "zone", None), health
+        )
+
+    def update(
+        self,
+        device_id: str,
+        *,
+        sensor_type: object = _UNSET,
+        zone: object = _UNSET,
+        health: object = _UNSET,
+        last_seen: object = _UNSET,
+    ) -> None:
+        """
+        Change some attributes of a registered device; the rest are kept.
+
+        Raises:
+            KeyError: If the device is not registered.
+            ValueError: For an unknown sensor type or health state.
+        """
+        slot = self._slots[device_id]
+        if sensor_type is not _UNSET and sensor_type != self._types[slot]:
+            if SensorMeta.lookup(sensor_type) is None:  # type: ignore[arg-type]
+                raise ValueError(f"Unknown sensor type: {sensor_type}")
+            self._by_type.discard(self._types[slot], slot)
+            self._types[slot] = sensor_type  # type: ignore[assignment]
+            self._by_type.add(sensor_type, slot)  # type: ignore[arg-type]
+        if zone is not _UNSET and zone != self._zones[slot]:
+            self._by_zone.discard(self._zones[slot], slot)
+            self._zones[slot] = zone  # type: ignore[assignment]
+            self._by_zone.add(zone, slot)  # type: ignore[arg-type]
+        if health is not _UNSET:
+            self.set_health(device_id, health)  # type: ignore[arg-type]
+        if last_seen is not _UNSET and last_seen is not None:
+            self._set_last_seen(slot, float(last_seen))  # type: ignore[arg-type]
+
+    def set_health(self, device_id: str, health: str) -> None:
+        self._check_health(health)
+        slot = self._slots[device_id]
+        if health != self._health[slot]:
+            self._by_health.discard(self._health[slot], slot)
+            self._health[slot] = health
+            self._by_health.add(health, slot)
+
+    def check_health(self, sensors: Iterable[object]) -> int:
+        """
+        Run each sensor object's ``health_check()`` and record the result,
+        registering sensors that are not in the catalog yet. A check that
+        raises counts as unhealthy.
+
+        Returns:
+            int: Number of unhealthy sensors.
+        """
+        unhealthy = 0
+        for sensor in sensors:
+            try:
+                healthy = bool(getattr(sensor, "health_check")())
+            except Exception:
+                healthy = False
+            health = "healthy" if healthy else "unhealthy"
+            unhealthy += not healthy
+            self.register_sensor(sensor, health)
+        return unhealthy
+
+    def mark_seen(self, device_ids: Iterable[str], timestamp: float) -> int:
+        """
+        Record that ``device_ids`` reported at ``timestamp``. Unknown IDs are
+        ignored; an older timestamp never moves a device back in time.
+
+        Returns:
+            int: Number of devices updated.
+        """
+        updated = 0
+        for device_id in device_ids:
+            slot = self._slots.get(device_id)
+            if slot is not None:
+                self._set_last_seen(slot, timestamp)
+                updated += 1
+        return updated
+
+    def remove(self, device_id: str) -> None:
+        slot = self._slots.pop(device_id)
+        self._by_type.discard(self._types[slot], slot)
+        self._by_zone.discard(self._zones[slot], slot)
+        self._by_health.discard(self._health[slot], slot)
+        last_seen = self._last_seen[slot]
+        if last_seen is None:
+            self._never_seen.discard(slot)
+        else:
+            self._discard_bucket(self._bucket(last_seen), slot)
+        self._ids[slot] = self._types[slot] = self._zones[slot] = self._last_seen[slot] = None
+        self._free.append(slot)
+
+    def _check_health(self, health: str) -> None:
+        if health not in HEALTH_STATES:
+            raise ValueError(f"health must be one of {HEALTH_STATES}")
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def _discard_bucket(self, bucket: int, slot: int) -> None:
+        if self._by_bucket.discard(bucket, slot):
+            del self._buckets[bisect.bisect_left(self._buckets, bucket)]
+
+    def _set_last_seen(self, slot: int, timestamp: float) -> None:
+        previous = self._last_seen[slot]
+        if previous is not None and timestamp <= previous:
+            return
+        bucket = self._bucket(timestamp)
+        if previous is None:
+            self._never_seen.discard(slot)
+        else:
+            old = self._bucket(previous)
+            if old == bucket:
+                self._last_seen[slot] = timestamp
+                return
+            self._discard_bucket(old, slot)
+        self._last_seen[slot] = timestamp
+        if not self._by_bucket.get(bucket):
+            bisect.insort(self._buckets, bucket)
+        self._by_bucket.add(bucket, slot)
+
+    # -- queries --------------------------------------------------------------
+
+    def get(self, device_id: str) -> DeviceRecord:
+        slot = self._slots[device_id]
+        return DeviceRecord(
+            device_id, self._types[slot], self._zones[slot],  # type: ignore[arg-type]
+            self._health[slot], self._last_seen[slot],
+        )
+
+    def zone_of(self, device_id: str) -> Optional[str]:
+        """
+        Zone of a device (None if it has none or is not registered).
+        """
+        slot = self._slots.get(device_id)
+        return None if slot is None else self._zones[slot]
+
+    def _seen_slots(self, since: Optional[float], before: Optional[float]) -> Set[int]:
+        lo = 0 if since is None else bisect.bisect_left(self._buckets, self._bucket(since))
+        hi = len(self._buckets)
+        if before is not None:
+            hi = bisect.bisect_right(self._buckets, self._bucket(before))
+        slots: Set[int] = set()
+        for bucket in self._buckets[lo:hi]:
+            slots |= self._by_bucket.get(bucket)
+        if before is not None:
+            slots |= self._never_seen
+        # Only the edge buckets can hold devices outside [since, before)
+        edges = set()
+        if since is not None:
+            edges.add(self._bucket(since))
+        if before is not None:
+            edges.add(self._bucket(before))
+        for bucket in edges:
+            for slot in self._by_bucket.get(bucket) & slots:
+                seen = self._last_seen[slot]
+                if (since is not None and seen < since) or (before is not None and seen >= before):
+                    slots.discard(slot)
+        return slots
+
+    def query(
+        self,
+        sensor_type: Optional[str] = None,
+        zone: object = _UNSET,
+        health: Optional[str] = None,
+        seen_since: Optional[float] = None,
+        seen_before: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        IDs of devices matching every given filter.
+
+        Args:
+            sensor_type: Registered type name; subclasses match too.
+            zone: Zone name (``None`` selects devices without a zone).
+            health: One of ``HEALTH_STATES``.
+            seen_since: Last seen at or after this time.
+            seen_before: Last seen before this time, or never seen.
+
+        Returns:
+            np.ndarray: Matching device IDs in registration order.
+        """
+        # Each filter is a union of index entries. Only the smallest is
+        # expanded; the others are membership tests on its slots.
+        filters: List[List[Set[int]]] = []
+        if sensor_type is not None:
+            filters.append([self._by_type.get(name) for name in SensorMeta.subtypes(sensor_type)])
+        if zone is not _UNSET:
+            filters.append([self._by_zone.get(zone)])  # type: ignore[arg-type]
+        if health is not None:
+            self._check_health(health)
+            filters.append([self._by_health.get(health)])
+        if seen_since is not None or seen_before is not None:
+            filters.append([self._seen_slots(seen_since, seen_before)])
+
+        if not filters:
+            slots: Iterable[int] = self._slots.values()
+        else:
+            filters.sort(key=lambda sets: sum(len(s) for s in sets))
+            slots = [slot for entry in filters[0] for slot in entry]
+            for sets in filters[1:]:
+                slots = [slot for slot in slots if any(slot in s for s in sets)]
+        ids = self._ids
+        return np.array([ids[slot] for slot in sorted(slots, key=self._order.__getitem__)], dtype=str)
+
+    def count(self, **filters: object) -> int:
+        return len(self.query(**filters))  # type: ignore[arg-type]
+
+    def sectors(self, sector_size: int, **filters: object) -> List[np.ndarray]:
+        """
+        Matching device IDs split into polling sectors of ``sector_size``.
+        """
+        if sector_size <= 0:
+            raise ValueError("sector_size must be positive")
+        ids = self.query(**filters)  # type: ignore[arg-type]
+        return [ids[start:start + sector_size] for start in range(0, len(ids), sector_size)]
+
+    def counts_by(self, attribute: str) -> Dict[Hashable, int]:
+        """
+        Device counts per ``"sensor_type"``, ``"zone"`` or ``"health"`` value.
+        """
+        indexes = {"sensor_type": self._by_type, "zone": self._by_zone, "health": self._by_health}
+        index = indexes.get(attribute)
+        if index is None:
+            raise ValueError("attribute must be sensor_type, zone or health")
+        return index.counts()
@@ -1,6 +1,8 @@
 from __future__ import annotations
 from typing import List, Protocol
 
+from telemetry.instrumentation import timed
+
 
 class Subscriber(Protocol):
     def notify(self, message: str) -> None:
@@ -23,6 +25,7 @@ class EmergencyResponseSystem:
         if subscriber in self._subscribers:
             self._subscribers.remove(subscriber)
 
+    @timed("alerting")
     def notify_all(self, message: str) -> None:
         for subscriber in self._subscribers:
             subscriber.notify(message)
@@ -8,8 +8,17 @@ from core.meta import SensorMeta
 class AbstractSensor(ABC, metaclass=SensorMeta):
     """
     Abstract base class for all sensors in the CityPulse system.
+
+    The ``POLL_*`` class attributes tell the adaptive poll scheduler how
+    often sensors of this type should be read.
     """
 
+    POLL_INTERVAL_SECONDS: float = 5.0
+    MIN_POLL_INTERVAL_SECONDS: float = 0.5
+    MAX_POLL_INTERVAL_SECONDS: float = 60.0
+    # Change in the watched value (one standard deviation) that halves the interval
+    POLL_VOLATILITY_SCALE: float = 5.0
+
     def __init__(self, device_id: str) -> None:
         if not device_id:
             raise ValueError("device_id must be a non-empty string")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from abc import ABCMeta
-from typing import Dict, Type
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Type
 
 
 class SensorMeta(ABCMeta):
@@ -21,3 +22,27 @@ class SensorMeta(ABCMeta):
     @classmethod
     def get_registry(mcls) -> Dict[str, Type]:
         return dict(mcls._registry)
+
+    @classmethod
+    def registry_view(mcls) -> Mapping[str, Type]:
+        """
+        Read-only live view of the registry (no copy).
+        """
+        return MappingProxyType(mcls._registry)
+
+    @classmethod
+    def lookup(mcls, name: str) -> Optional[Type]:
+        return mcls._registry.get(name)
+
+    @classmethod
+    def subtypes(mcls, name: str) -> List[str]:
+        """
+        Names of the registered classes that are ``name`` or derive from it.
+
+        Raises:
+            ValueError: If ``name`` is not a registered sensor type.
+        """
+        base = mcls._registry.get(name)
+        if base is None:
+            raise ValueError(f"Unknown sensor type: {name}")
+        return [other for other, cls in mcls._registry.items() if issubclass(cls, base)]
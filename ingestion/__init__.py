@@ -4,6 +4,12 @@ Ingestion package for CityPulse IoT.
 This package handles real-time data ingestion from sensors, including:
 - generator.py: Infinite data stream simulators using generators (yield).
 - stream.py: Async polling logic using asyncio and asyncio.gather().
+- gateway.py: UDP/TCP gateway for device-pushed readings (imported on demand,
+  since it needs NumPy).
+- loadgen.py: Load generator for the gateway.
+- dedup.py: Per-sensor duplicate suppression and bounded jitter-buffer reordering.
+- scheduler.py: Adaptive per-sensor poll scheduling.
+- restored.py: Snapshot records held until their sensor comes back (warm restart).
 """
 
 from ingestion.generator import sensor_stream_simulator
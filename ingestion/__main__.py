@@ -0,0 +1,84 @@
+"""
+Slim ingestion-only entry point.
+
+    python -m ingestion --sensors 100 --delay 0.1 --rounds 0 --metrics-port 8000
+
+Only imports the ingestion package and the standard library, so pods that
+just poll sensors start without loading pandas, NumPy or cryptography.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import List, Sequence
+
+from ingestion.stream import poll_sector
+from telemetry.metrics import start_metrics_server
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m ingestion", description=__doc__)
+    parser.add_argument("--sensors", type=int, default=100, help="Number of sensors to poll")
+    parser.add_argument("--delay", type=float, default=0.1, help="Simulated poll latency in seconds")
+    parser.add_argument("--rounds", type=int, default=0, help="Polling rounds (0 = run forever)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics on this port")
+    args = parser.parse_args(argv)
+
+    if args.sensors <= 0:
+        parser.error("--sensors must be positive")
+    if args.rounds < 0:
+        parser.error("--rounds must be non-negative")
+    return args
+
+
+async def run(
+    sensor_count: int,
+    delay_seconds: float,
+    rounds: int,
+    metrics_port: int | None = None,
+) -> int:
+    """
+    Poll the sector repeatedly and print a one-line summary per round.
+
+    Returns:
+        int: Total readings collected.
+    """
+    server = None
+    if metrics_port is not None:
+        server = await start_metrics_server(port=metrics_port)
+        print(f"[Metrics] Serving /metrics on port {metrics_port}")
+
+    sensor_ids: List[str] = [f"SENSOR-{i}" for i in range(1, sensor_count + 1)]
+    total = 0
+    completed = 0
+
+    try:
+        while rounds == 0 or completed < rounds:
+            start = time.perf_counter()
+            readings = await poll_sector(sensor_ids, delay_seconds=delay_seconds)
+            elapsed = time.perf_counter() - start
+
+            total += len(readings)
+            completed += 1
+            print(f"[Ingestion] Round {completed}: {len(readings)} readings in {elapsed * 1000:.1f} ms")
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    return total
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    try:
+        asyncio.run(run(args.sensors, args.delay, args.rounds, args.metrics_port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ingestion.gateway import ReadingBatch, decode_ids
+from ingestion.restored import RestoredRecords
+
+Reading = Mapping[str, Any]
+
+NEW = 0
+DUPLICATE = 1
+LATE = 2
+
+
+def sequence_of(reading: Reading) -> int:
+    """
+    Ordering key for a reading: the device ``sequence`` when present,
+    otherwise its timestamp in milliseconds.
+    """
+    sequence = reading.get("sequence")
+    if sequence is not None:
+        return int(sequence)
+    return int(round(float(reading["timestamp"]) * 1000))
+
+
+class _SensorTrack:
+    """
+    Per-sensor state: a sliding bitmap of the last ``window`` sequence
+    numbers plus a bounded reorder heap. Memory is fixed per sensor.
+    """
+
+    __slots__ = ("top", "bits", "released", "heap")
+
+    def __init__(self) -> None:
+        self.top = -1  # highest sequence seen
+        self.bits = 0  # bit i set => sequence (top - i) seen
+        self.released = -1  # highest sequence passed downstream
+        self.heap: List[Tuple[int, int, float, Reading]] = []
+
+    def mark(self, sequence: int, window: int) -> int:
+        if sequence > self.top:
+            shift = sequence - self.top
+            self.bits = ((self.bits << shift) | 1) & ((1 << window) - 1) if shift < window else 1
+            self.top = sequence
+            return NEW
+
+        offset = self.top - sequence
+        if offset >= window:
+            return LATE
+        mask = 1 << offset
+        if self.bits & mask:
+            return DUPLICATE
+        self.bits |= mask
+        return NEW
+
+
+class Deduplicator:
+    """
+    Drops duplicate device readings and restores per-sensor order.
+
+    Each sensor keeps a ``window``-bit sliding bitmap over its sequence
+    numbers, so a retransmission anywhere in the last ``window`` sequences is
+    recognised in O(1), and anything older than the window is dropped as late.
+    Accepted readings wait up to ``jitter_seconds`` in a per-sensor heap
+    (at most ``max_buffered`` entries) and are released in sequence order.
+    A reading that arrives after a higher sequence was already released is
+    dropped as late. Without a jitter delay nothing is reordered, so a
+    reading that is merely out of order (inside the window, not seen yet)
+    is passed on as it arrives.
+
+    Sensor IDs come from unauthenticated traffic, so at most ``max_sensors``
+    windows are kept; the least recently seen sensor's window is evicted
+    first (its buffered readings are still released).
+
+    Gateway ``ReadingBatch``es are checked on their ``sensor_id`` and
+    ``sequence`` columns: without a jitter delay the result is the same
+    batch with a mask applied, and per-reading dicts are only built for
+    readings that wait in a reorder heap.
+    """
+
+    def __init__(
+        self,
+        window: int = 1024,
+        jitter_seconds: float = 0.0,
+        max_buffered: int = 64,
+        max_sensors: int = 100_000,
+    ) -> None:
+        if window <= 0 or max_buffered <= 0 or max_sensors <= 0:
+            raise ValueError("window, max_buffered and max_sensors must be positive")
+        if jitter_seconds < 0:
+            raise ValueError("jitter_seconds must be non-negative")
+        self.window = window
+        self.jitter_seconds = jitter_seconds
+        self.max_buffered = max_buffered
+        self.max_sensors = max_sensors
+        self._tracks: "OrderedDict[str, _SensorTrack]" = OrderedDict()  # least recently seen first
+        self._waiting: Dict[str, _SensorTrack] = {}  # sensors with buffered readings
+        self._arrivals = itertools.count()
+        self._dirty: Set[str] = set()  # sensors changed since the last export
+        self._restored = RestoredRecords()  # snapshot windows not yet turned into tracks
+
+        self.accepted = 0
+        self.duplicates = 0
+        self.late = 0
+        self.forced = 0  # released early because a sensor's buffer was full
+        self.evicted = 0  # windows dropped to stay within max_sensors
+
+    @property
+    def buffered(self) -> int:
+        return sum(len(track.heap) for track in self._waiting.values())
+
+    def _admit(self, sensor_id: str, sequence: int) -> _SensorTrack | None:
+        """
+        Window check for one reading; returns its track if it is accepted.
+        """
+        tracks = self._tracks
+        track = tracks.get(sensor_id)
+        if track is None:
+            # An evicted sensor's readings may still be waiting in its old track
+            track = self._waiting.get(sensor_id)
+            if track is None and self._restored:
+                track = self._restored_track(sensor_id)
+            tracks[sensor_id] = track = track or _SensorTrack()
+            if len(tracks) > self.max_sensors:
+                tracks.popitem(last=False)
+                self.evicted += 1
+        else:
+            tracks.move_to_end(sensor_id)
+        status = track.mark(sequence, self.window)
+        if status == DUPLICATE:
+            self.duplicates += 1
+            return None
+        if status == LATE or (self.jitter_seconds and sequence <= track.released):
+            self.late += 1
+            return None
+        self.accepted += 1
+        self._dirty.add(sensor_id)
+        return track
+
+    def _buffer(self, track: _SensorTrack, sensor_id: str, sequence: int, reading: Reading,
+                now: float, ready: List[Reading]) -> None:
+        heapq.heappush(track.heap, (sequence, next(self._arrivals), now, reading))
+        self._waiting[sensor_id] = track
+        if len(track.heap) > self.max_buffered:
+            self.forced += 1
+            ready.append(self._pop(track))
+            self._dirty.add(sensor_id)
+
+    def push(self, readings: Iterable[Reading], now: float) -> Sequence[Reading]:
+        """
+        Filter a batch. Returns the readings that can go downstream now
+        (all accepted ones when ``jitter_seconds`` is 0); for a
+        ``ReadingBatch`` without jitter that is a masked ``ReadingBatch``.
+        """
+        if isinstance(readings, ReadingBatch):
+            return self._push_batch(readings, now)
+
+        ready: List[Reading] = []
+        for reading in readings:
+            sensor_id = reading["sensor_id"]
+            sequence = sequence_of(reading)
+            track = self._admit(sensor_id, sequence)
+            if track is None:
+                continue
+            if not self.jitter_seconds:
+                track.released = max(track.released, sequence)
+                ready.append(reading)
+            else:
+                self._buffer(track, sensor_id, sequence, reading, now, ready)
+        return ready
+
+    def _push_batch(self, batch: ReadingBatch, now: float) -> Sequence[Reading]:
+        sensor_ids = decode_ids(batch.column("sensor_id"))
+        sequences = batch.column("sequence").tolist()
+
+        if not self.jitter_seconds:
+            keep = np.zeros(len(sensor_ids), dtype=bool)
+            for position, (sensor_id, sequence) in enumerate(zip(sensor_ids, sequences)):
+                track = self._admit(sensor_id, sequence)
+                if track is not None:
+                    track.released = max(track.released, sequence)
+                    keep[position] = True
+            return batch if keep.all() else ReadingBatch(batch.records[keep])
+
+        ready: List[Reading] = []
+        for position, (sensor_id, sequence) in enumerate(zip(sensor_ids, sequences)):
+            track = self._admit(sensor_id, sequence)
+            if track is not None:
+                self._buffer(track, sensor_id, sequence, batch[position], now, ready)
+        return ready
+
+    def _pop(self, track: _SensorTrack) -> Reading:
+        sequence, _, _, reading = heapq.heappop(track.heap)
+        track.released = sequence
+        return reading
+
+    def release(self, now: float, force: bool = False) -> List[Reading]:
+        """
+        Readings whose jitter delay has expired (everything when ``force``),
+        in sequence order per sensor.
+        """
+        ready: List[Reading] = []
+        cutoff = now - self.jitter_seconds
+        for sensor_id, track in list(self._waiting.items()):
+            heap = track.heap
+            while heap and (force or heap[0][2] <= cutoff):
+                ready.append(self._pop(track))
+                self._dirty.add(sensor_id)
+            if not heap:
+                del self._waiting[sensor_id]
+        return ready
+
+    def forget(self, sensor_id: str) -> None:
+        """
+        Drop all state for a sensor (e.g. after decommissioning it).
+        """
+        self._tracks.pop(sensor_id, None)
+        self._waiting.pop(sensor_id, None)
+        self._dirty.discard(sensor_id)
+        self._restored.take(sensor_id)
+
+    def state_dtype(self) -> np.dtype:
+        return np.dtype([
+            ("sensor_id", "S64"),
+            ("top", "<i8"),
+            ("released", "<i8"),
+            ("bits", "u1", ((self.window + 7) // 8,)),
+        ])
+
+    def export_state(self, chunk_size: int = 4096, changed_only: bool = False) -> Iterator[np.ndarray]:
+        """
+        Per-sensor sequence windows as ``state_dtype()`` records, in chunks.
+        With ``changed_only``, just the sensors that changed since the
+        previous export; otherwise restored windows of sensors that have not
+        reported yet are included too. Readings still waiting in a reorder
+        buffer are not included.
+        """
+        dtype = self.state_dtype()
+        width = dtype["bits"].shape[0]
+        sensor_ids = list(self._dirty if changed_only else self._tracks)
+        self._dirty = set()
+        for start in range(0, len(sensor_ids), chunk_size):
+            chunk = [s for s in sensor_ids[start:start + chunk_size] if s in self._tracks]
+            records = np.zeros(len(chunk), dtype=dtype)
+            for row, sensor_id in enumerate(chunk):
+                track = self._tracks[sensor_id]
+                records[row] = (
+                    sensor_id, track.top, track.released,
+                    np.frombuffer(track.bits.to_bytes(width, "little"), np.uint8),
+                )
+            yield records
+        if not changed_only:
+            yield from self._restored.pending(self._tracks)
+
+    def restore_state(self, records: np.ndarray) -> int:
+        """
+        Load records from ``export_state``; later calls take precedence.
+
+        Windows of sensors already tracked are replaced now. The other
+        records stay in ``records`` (e.g. a memory-mapped snapshot) and
+        become tracks on their sensor's next reading.
+
+        Returns:
+            int: Number of records loaded.
+        """
+        sensor_ids = self._restored.add(records)
+        for sensor_id in [s for s in sensor_ids if s in self._tracks]:
+            self._tracks[sensor_id] = self._restored_track(sensor_id) or _SensorTrack()
+        return len(records)
+
+    def _restored_track(self, sensor_id: str) -> Optional[_SensorTrack]:
+        record = self._restored.take(sensor_id)
+        if record is None:
+            return None
+        track = _SensorTrack()
+        track.top, track.released = int(record["top"]), int(record["released"])
+        track.bits = int.from_bytes(record["bits"].tobytes(), "little")
+        return track
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "late": self.late,
+            "forced": self.forced,
+            "evicted": self.evicted,
+            "buffered": self.buffered,
+        }
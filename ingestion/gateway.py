@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from telemetry.metrics import REGISTRY
+
+# Fixed-size little-endian device record (56 bytes, 8-byte aligned fields)
+RECORD_DTYPE = np.dtype([
+    ("sensor_id", "S16"),
+    ("sequence", "<u8"),
+    ("timestamp", "<f8"),
+    ("temperature_celsius", "<f8"),
+    ("humidity_percent", "<f8"),
+    ("co2_ppm", "<f8"),
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+
+# TCP connections starting with this magic carry binary records; anything
+# else is treated as line-delimited CSV:
+#   sensor_id,sequence,timestamp,temperature_celsius,humidity_percent,co2_ppm
+BINARY_MAGIC = b"CPB1"
+
+_RECORDS = REGISTRY.counter(
+    "citypulse_gateway_records_total", "Device records accepted by the gateway."
+)
+_RATE_LIMITED = REGISTRY.counter(
+    "citypulse_gateway_rate_limited_total", "Device records dropped by per-device rate limits."
+)
+_MALFORMED = REGISTRY.counter(
+    "citypulse_gateway_malformed_total", "Datagrams or lines that could not be parsed."
+)
+_QUEUE_FULL = REGISTRY.counter(
+    "citypulse_gateway_queue_full_total", "UDP batches dropped because the pipeline was full."
+)
+
+
+class ReadingBatch:
+    """
+    Batch of device records backed by a structured NumPy view.
+
+    Parsing a datagram wraps its buffer with ``np.frombuffer`` (no copy);
+    ``column()`` returns views for vectorized analytics, and per-reading
+    dicts are only built when a consumer indexes or iterates the batch.
+    """
+
+    __slots__ = ("records",)
+
+    def __init__(self, records: np.ndarray) -> None:
+        if records.dtype != RECORD_DTYPE:
+            raise TypeError("records must use RECORD_DTYPE")
+        self.records = records
+
+    @classmethod
+    def from_buffer(cls, buffer: Any) -> "ReadingBatch":
+        """
+        Zero-copy view over a bytes-like buffer of whole records.
+
+        Raises:
+            ValueError: If the buffer is not a multiple of RECORD_SIZE.
+        """
+        view = memoryview(buffer)
+        if view.nbytes % RECORD_SIZE:
+            raise ValueError("Buffer length is not a multiple of the record size")
+        return cls(np.frombuffer(view, dtype=RECORD_DTYPE))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.records[name]
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        record = self.records[position]
+        return {
+            "sensor_id": record["sensor_id"].decode("ascii", "replace"),
+            "sequence": int(record["sequence"]),
+            "timestamp": float(record["timestamp"]),
+            "temperature_celsius": float(record["temperature_celsius"]),
+            "humidity_percent": float(record["humidity_percent"]),
+            "co2_ppm": float(record["co2_ppm"]),
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(len(self.records)):
+            yield self[position]
+
+
+def decode_ids(raw: np.ndarray) -> List[str]:
+    """
+    Decode a fixed-width bytes column of device IDs to ``str``.
+    """
+    try:
+        return raw.astype(str).tolist()  # one C-level decode for ASCII IDs
+    except UnicodeDecodeError:
+        return [value.decode("ascii", "replace") for value in raw.tolist()]
+
+
+def encode_records(readings: Sequence[Tuple[str, int, float, float, float, float]]) -> bytes:
+    """
+    Encode ``(sensor_id, sequence, timestamp, temperature, humidity, co2)``
+    tuples in the binary wire format.
+    """
+    return np.array(readings, dtype=RECORD_DTYPE).tobytes()
+
+
+def parse_lines(data: bytes) -> ReadingBatch:
+    """
+    Parse complete CSV lines into a batch. Malformed lines are skipped.
+    """
+    lines = data.splitlines()
+    records = np.empty(len(lines), dtype=RECORD_DTYPE)
+    count = 0
+    for line in lines:
+        fields = line.split(b",")
+        if len(fields) != 6:
+            if line.strip():
+                _MALFORMED.inc()
+            continue
+        try:
+            records[count] = (
+                fields[0].strip(), int(fields[1]), float(fields[2]),
+                float(fields[3]), float(fields[4]), float(fields[5]),
+            )
+        except ValueError:
+            _MALFORMED.inc()
+            continue
+        count += 1
+    return ReadingBatch(records[:count])
+
+
+class DeviceRateLimiter:
+    """
+    Per-device token bucket: ``rate`` records per second with ``burst`` headroom.
+
+    Device IDs come from unauthenticated traffic, so at most ``max_devices``
+    buckets are kept; the least recently seen device is evicted first. A
+    bucket idle for ``burst / rate`` seconds is full again, so evicting it
+    changes nothing.
+    """
+
+    def __init__(self, rate: float, burst: float, max_devices: int = 100_000) -> None:
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive")
+        if max_devices <= 0:
+            raise ValueError("max_devices must be positive")
+        self.rate = rate
+        self.burst = burst
+        self.max_devices = max_devices
+        self._buckets: "OrderedDict[bytes, List[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def allow(self, device: bytes, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(device)
+        if bucket is None:
+            bucket = self._buckets[device] = [self.burst, now]
+            if len(self._buckets) > self.max_devices:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(device)
+
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1.0
+        return True
+
+    def filter(self, batch: ReadingBatch) -> ReadingBatch:
+        """
+        Drop records over their device's limit. The batch is returned
+        unchanged (still zero-copy) when nothing is dropped.
+        """
+        now = time.monotonic()
+        ids = batch.records["sensor_id"]
+        allowed = np.fromiter((self.allow(device, now) for device in ids), bool, len(ids))
+        if allowed.all():
+            return batch
+        _RATE_LIMITED.inc(int(len(ids) - allowed.sum()))
+        return ReadingBatch(batch.records[allowed])
+
+
+Submit = Callable[[ReadingBatch], Awaitable[bool]]
+TrySubmit = Callable[[ReadingBatch], bool]
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, gateway: "ReadingGateway") -> None:
+        self._gateway = gateway
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        try:
+            batch = ReadingBatch.from_buffer(data)
+        except ValueError:
+            _MALFORMED.inc()
+            return
+        self._gateway.accept_nowait(batch)
+
+
+class ReadingGateway:
+    """
+    Accepts device pushes over UDP (binary datagrams of whole records) and
+    TCP (binary after ``BINARY_MAGIC``, otherwise CSV lines) and feeds them
+    to the same downstream path as ``poll_sector``.
+
+    TCP batches go through ``submit`` (awaiting it propagates backpressure to
+    the sender); UDP batches use ``try_submit`` and are dropped when full.
+    Both return False once the pipeline stops taking input, which ends the
+    connection.
+    """
+
+    def __init__(
+        self,
+        submit: Submit,
+        try_submit: TrySubmit,
+        rate_limiter: Optional[DeviceRateLimiter] = None,
+        read_size: int = 64 * 1024,
+    ) -> None:
+        self._submit = submit
+        self._try_submit = try_submit
+        self.rate_limiter = rate_limiter
+        self.read_size = read_size - read_size % RECORD_SIZE
+        self._udp: Optional[asyncio.DatagramTransport] = None
+        self._tcp: Optional[asyncio.AbstractServer] = None
+        self._streams: Dict["asyncio.Task[Any]", asyncio.StreamWriter] = {}
+
+    def _limit(self, batch: ReadingBatch) -> ReadingBatch:
+        if self.rate_limiter is not None and len(batch):
+            batch = self.rate_limiter.filter(batch)
+        _RECORDS.inc(len(batch))
+        return batch
+
+    def accept_nowait(self, batch: ReadingBatch) -> None:
+        batch = self._limit(batch)
+        if len(batch) and not self._try_submit(batch):
+            _QUEUE_FULL.inc()
+
+    async def accept(self, batch: ReadingBatch) -> bool:
+        """
+        Returns False if the pipeline no longer takes input.
+        """
+        batch = self._limit(batch)
+        return not len(batch) or await self._submit(batch)
+
+    async def start_udp(self, host: str = "0.0.0.0", port: int = 9000) -> Tuple[str, int]:
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DatagramProtocol(self), local_addr=(host, port)
+        )
+        self._udp = transport
+        return transport.get_extra_info("sockname")[:2]
+
+    async def start_tcp(self, host: str = "0.0.0.0", port: int = 9001) -> Tuple[str, int]:
+        self._tcp = await asyncio.start_server(self._handle_stream, host, port)
+        return self._tcp.sockets[0].getsockname()[:2]
+
+    async def _handle_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._streams[task] = writer
+        try:
+            try:
+                # The magic may arrive split across TCP segments
+                head = await reader.readexactly(len(BINARY_MAGIC))
+            except asyncio.IncompleteReadError as exc:
+                head = exc.partial  # stream ended first: a (very short) CSV stream
+            if head == BINARY_MAGIC:
+                await self._read_binary(reader)
+            else:
+                await self._read_lines(reader, head)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._streams.pop(task, None)
+            writer.close()
+
+    async def _read_binary(self, reader: asyncio.StreamReader) -> None:
+        pending = bytearray()
+        while True:
+            chunk = await reader.read(self.read_size)
+            if not chunk:
+                return
+            if not pending and len(chunk) % RECORD_SIZE == 0:
+                if not await self.accept(ReadingBatch.from_buffer(chunk)):  # aligned: zero-copy
+                    return
+                continue
+
+            pending += chunk
+            whole = len(pending) - len(pending) % RECORD_SIZE
+            if whole:
+                # bytes() detaches the records from the buffer we keep appending to
+                batch = ReadingBatch.from_buffer(bytes(memoryview(pending)[:whole]))
+                del pending[:whole]
+                if not await self.accept(batch):
+                    return
+
+    async def _read_lines(self, reader: asyncio.StreamReader, head: bytes) -> None:
+        pending = bytearray(head)
+        while True:
+            chunk = await reader.read(self.read_size)
+            if not chunk:
+                if pending:
+                    await self.accept(parse_lines(bytes(pending)))
+                return
+            pending += chunk
+            cut = pending.rfind(b"\n") + 1
+            if cut:
+                batch = parse_lines(bytes(memoryview(pending)[:cut]))
+                del pending[:cut]
+                if not await self.accept(batch):
+                    return
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """
+        Stop taking device traffic: close the listeners and every open TCP
+        connection, then wait up to ``timeout`` for their handlers to hand
+        what was already received to the pipeline (stragglers are cancelled).
+        Call it before stopping the pipeline, so nothing arrives after the drain.
+        """
+        if self._udp is not None:
+            self._udp.close()
+            self._udp = None
+        if self._tcp is not None:
+            self._tcp.close()
+            self._tcp = None
+        handlers = list(self._streams)
+        for writer in self._streams.values():
+            writer.close()  # buffered data is still read, then the handler sees EOF
+        if handlers:
+            _, pending = await asyncio.wait(handlers, timeout=timeout)
+            for task in pending:
+                task.cancel()
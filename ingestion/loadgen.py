@@ -0,0 +1,121 @@
+"""
+Load generator for the network ingestion gateway.
+
+    python -m ingestion.loadgen --udp 127.0.0.1:9000 --devices 1000 --batch 100 --seconds 10
+    python -m ingestion.loadgen --tcp 127.0.0.1:9001 --lines --seconds 10
+
+Sends simulated device readings as fast as possible (or at ``--rate``
+records/second) and prints the achieved send rate.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import socket
+import time
+from typing import List, Sequence, Tuple
+
+from ingestion.gateway import BINARY_MAGIC, encode_records
+
+Record = Tuple[str, int, float, float, float, float]
+
+
+def make_records(devices: int, batch: int, sequences: List[int]) -> List[Record]:
+    now = time.time()
+    records: List[Record] = []
+    for _ in range(batch):
+        device = random.randrange(devices)
+        sequences[device] += 1
+        records.append((
+            f"DEV-{device}",
+            sequences[device],
+            now,
+            random.uniform(15.0, 100.0),
+            random.uniform(10.0, 90.0),
+            random.uniform(300.0, 2000.0),
+        ))
+    return records
+
+
+def encode_lines(records: Sequence[Record]) -> bytes:
+    return "".join(
+        f"{sid},{seq},{ts:.6f},{t:.3f},{h:.3f},{c:.3f}\n" for sid, seq, ts, t, h, c in records
+    ).encode()
+
+
+def _address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+async def run(args: argparse.Namespace) -> Tuple[int, float]:
+    """
+    Returns:
+        Tuple[int, float]: (records sent, elapsed seconds)
+    """
+    sequences = [0] * args.devices
+    sent = 0
+    udp = None
+    writer = None
+
+    if args.udp:
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        udp.connect(_address(args.udp))
+    else:
+        _, writer = await asyncio.open_connection(*_address(args.tcp))
+        if not args.lines:
+            writer.write(BINARY_MAGIC)
+
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    try:
+        while time.perf_counter() < deadline:
+            records = make_records(args.devices, args.batch, sequences)
+            if udp is not None:
+                try:
+                    udp.send(encode_records(records))
+                except ConnectionRefusedError:
+                    pass  # gateway not up yet / restarting
+            else:
+                assert writer is not None
+                writer.write(encode_lines(records) if args.lines else encode_records(records))
+                await writer.drain()
+            sent += len(records)
+
+            if args.rate:
+                ahead = sent / args.rate - (time.perf_counter() - start)
+                if ahead > 0:
+                    await asyncio.sleep(ahead)
+    finally:
+        if udp is not None:
+            udp.close()
+        if writer is not None:
+            writer.close()
+            await writer.wait_closed()
+
+    return sent, time.perf_counter() - start
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m ingestion.loadgen", description=__doc__)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--udp", help="host:port of the gateway UDP listener")
+    target.add_argument("--tcp", help="host:port of the gateway TCP listener")
+    parser.add_argument("--lines", action="store_true", help="TCP only: send CSV lines")
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=100, help="Records per datagram/write")
+    parser.add_argument("--rate", type=float, default=0.0, help="Records/second (0 = unthrottled)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    if args.devices <= 0 or args.batch <= 0:
+        parser.error("--devices and --batch must be positive")
+
+    sent, elapsed = asyncio.run(run(args))
+    print(f"[LoadGen] Sent {sent} records in {elapsed:.2f}s ({sent / elapsed:,.0f} records/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Container, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ingestion.gateway import decode_ids
+
+
+class RestoredRecords:
+    """
+    Snapshot records waiting for their sensor to come back.
+
+    Each ``add`` keeps the record array as it was passed (typically a
+    memory-mapped snapshot file) plus an ID -> row index; only the ID column
+    is read up front. A record is read when ``take`` asks for its sensor,
+    and for a sensor in several arrays the most recently added one wins.
+    """
+
+    def __init__(self) -> None:
+        self._layers: List[Tuple[np.ndarray, Dict[str, int]]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._layers)
+
+    def add(self, records: np.ndarray) -> List[str]:
+        """
+        Returns:
+            List[str]: The sensor IDs in ``records``.
+        """
+        sensor_ids = decode_ids(records["sensor_id"])
+        if sensor_ids:
+            self._layers.append((records, dict(zip(sensor_ids, range(len(sensor_ids))))))
+        return sensor_ids
+
+    def take(self, sensor_id: str) -> Optional[np.void]:
+        """
+        Remove and return the newest record for ``sensor_id``.
+        """
+        record = None
+        for records, index in reversed(self._layers):
+            row = index.pop(sensor_id, None)
+            if row is not None and record is None:
+                record = records[row]
+        self._layers = [layer for layer in self._layers if layer[1]]
+        return record
+
+    def pending(self, skip: Container[str]) -> List[np.ndarray]:
+        """
+        The newest record of every waiting sensor not in ``skip``, one array
+        per layer, so a full snapshot can carry them over.
+        """
+        seen = set()
+        chunks = []
+        for records, index in reversed(self._layers):
+            rows = [
+                row for sensor_id, row in index.items() if sensor_id not in seen and sensor_id not in skip
+            ]
+            seen.update(index)
+            if rows:
+                chunks.append(records[np.sort(np.array(rows))])
+        return chunks
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from core.meta import SensorMeta
+from ingestion.restored import RestoredRecords
+
+# Snapshot record for one sensor's learned state (see export_state)
+STATE_DTYPE = np.dtype([
+    ("sensor_id", "S64"),
+    ("mean", "<f8"),
+    ("variance", "<f8"),
+    ("samples", "<u8"),
+    ("alerting", "?"),
+    ("interval", "<f8"),
+])
+
+
+@dataclass(frozen=True)
+class PollPolicy:
+    """
+    Poll timing for one sensor type.
+    """
+
+    base_interval: float = 5.0
+    min_interval: float = 0.5
+    max_interval: float = 60.0
+    volatility_scale: float = 5.0
+
+    def __post_init__(self) -> None:
+        if not 0 < self.min_interval <= self.base_interval <= self.max_interval:
+            raise ValueError("Require 0 < min_interval <= base_interval <= max_interval")
+        if self.volatility_scale <= 0:
+            raise ValueError("volatility_scale must be positive")
+
+    @classmethod
+    def for_sensor_class(cls, sensor_class: type) -> "PollPolicy":
+        default = cls()
+        return cls(
+            base_interval=getattr(sensor_class, "POLL_INTERVAL_SECONDS", default.base_interval),
+            min_interval=getattr(sensor_class, "MIN_POLL_INTERVAL_SECONDS", default.min_interval),
+            max_interval=getattr(sensor_class, "MAX_POLL_INTERVAL_SECONDS", default.max_interval),
+            volatility_scale=getattr(sensor_class, "POLL_VOLATILITY_SCALE", default.volatility_scale),
+        )
+
+
+class _SensorState:
+    __slots__ = ("policy", "mean", "variance", "samples", "alerting", "interval", "version")
+
+    def __init__(self, policy: PollPolicy) -> None:
+        self.policy = policy
+        self.mean = 0.0
+        self.variance = 0.0
+        self.samples = 0
+        self.alerting = False
+        self.interval = policy.base_interval
+        self.version = 0
+
+
+class AdaptivePollScheduler:
+    """
+    Per-sensor poll intervals driven by volatility, alert state and type.
+
+    Each sensor keeps an exponentially weighted mean/variance of its watched
+    value. Its next interval is ``base / (1 + stddev / volatility_scale)``
+    clamped to the type's [min, max]; a sensor in alert is polled at its
+    minimum interval. Due times live in a heap, so taking or rescheduling a
+    sensor is O(log n); removed sensors are dropped lazily.
+
+    ``max_polls_per_second`` caps the pod's total poll rate with a token
+    bucket. When demand exceeds it, the most overdue sensors go first.
+    """
+
+    def __init__(
+        self,
+        max_polls_per_second: Optional[float] = None,
+        alpha: float = 0.2,
+        burst_seconds: float = 1.0,
+    ) -> None:
+        if max_polls_per_second is not None and max_polls_per_second <= 0:
+            raise ValueError("max_polls_per_second must be positive")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be within (0, 1]")
+        self.max_polls_per_second = max_polls_per_second
+        self.alpha = alpha
+        self.burst_seconds = burst_seconds
+        self._burst = max(1.0, (max_polls_per_second or 0.0) * burst_seconds)
+        self._tokens = self._burst
+        self._refilled_at: Optional[float] = None
+        self._heap: List[Tuple[float, int, str]] = []
+        self._states: Dict[str, _SensorState] = {}
+        self._policies: Dict[Optional[str], PollPolicy] = {}
+        self._versions = itertools.count()
+        self._dirty: Set[str] = set()  # sensors changed since the last export
+        self._restored = RestoredRecords()  # snapshot state of sensors not yet added
+        self.deferred = 0  # pop_due calls that left due sensors waiting on the budget
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def set_budget(self, max_polls_per_second: Optional[float]) -> None:
+        """
+        Change the poll budget while running (e.g. when a shard's share changes).
+        """
+        if max_polls_per_second is not None and max_polls_per_second <= 0:
+            raise ValueError("max_polls_per_second must be positive")
+        self.max_polls_per_second = max_polls_per_second
+        self._burst = max(1.0, (max_polls_per_second or 0.0) * self.burst_seconds)
+        self._tokens = min(self._tokens, self._burst)
+
+    def policy_for(self, sensor_type: Optional[str]) -> PollPolicy:
+        policy = self._policies.get(sensor_type)
+        if policy is None:
+            sensor_class = SensorMeta.lookup(sensor_type) if sensor_type else None
+            policy = PollPolicy.for_sensor_class(sensor_class) if sensor_class else PollPolicy()
+            self._policies[sensor_type] = policy
+        return policy
+
+    def add(self, sensor_id: str, sensor_type: Optional[str] = None, now: float = 0.0) -> None:
+        """
+        Start scheduling ``sensor_id``; it is due immediately.
+        """
+        if sensor_id in self._states:
+            return
+        state = _SensorState(self.policy_for(sensor_type))
+        record = self._restored.take(sensor_id) if self._restored else None
+        if record is not None:
+            self._apply(state, record)
+            policy = state.policy
+            state.interval = min(policy.max_interval, max(policy.min_interval, float(record["interval"])))
+        state.version = next(self._versions)
+        self._states[sensor_id] = state
+        heapq.heappush(self._heap, (now, state.version, sensor_id))
+
+    def remove(self, sensor_id: str) -> None:
+        self._states.pop(sensor_id, None)
+        self._dirty.discard(sensor_id)
+
+    def set_sensors(
+        self,
+        sensor_ids: Iterable[str],
+        sensor_types: Optional[Mapping[str, str]] = None,
+        now: float = 0.0,
+    ) -> None:
+        """
+        Make the scheduled set equal to ``sensor_ids`` (keeping existing state).
+        """
+        wanted = set(sensor_ids)
+        for sensor_id in list(self._states):
+            if sensor_id not in wanted:
+                self.remove(sensor_id)
+        types = sensor_types or {}
+        for sensor_id in wanted:
+            self.add(sensor_id, types.get(sensor_id), now)
+
+    def interval(self, sensor_id: str) -> float:
+        return self._states[sensor_id].interval
+
+    def _refill(self, now: float) -> None:
+        if self.max_polls_per_second is None:
+            return
+        if self._refilled_at is not None:
+            elapsed = max(0.0, now - self._refilled_at)
+            self._tokens = min(self._burst, self._tokens + elapsed * self.max_polls_per_second)
+        self._refilled_at = now
+
+    def pop_due(self, now: float, limit: Optional[int] = None) -> List[str]:
+        """
+        Take sensors whose due time has passed, within the poll budget.
+
+        Every returned sensor must later be passed to ``complete`` to be
+        rescheduled.
+        """
+        self._refill(now)
+        allowance = limit if limit is not None else len(self._heap)
+        if self.max_polls_per_second is not None:
+            allowance = min(allowance, int(self._tokens))
+
+        due: List[str] = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, version, sensor_id = heap[0]
+            state = self._states.get(sensor_id)
+            if state is None or state.version != version:
+                heapq.heappop(heap)  # stale entry
+                continue
+            if len(due) >= allowance:
+                break
+            heapq.heappop(heap)
+            due.append(sensor_id)
+
+        if self.max_polls_per_second is not None:
+            self._tokens -= len(due)
+            if heap and heap[0][0] <= now:
+                self.deferred += 1
+        return due
+
+    def complete(
+        self,
+        sensor_id: str,
+        now: float,
+        value: Optional[float] = None,
+        alerting: Optional[bool] = None,
+    ) -> float:
+        """
+        Record a poll result and schedule the sensor's next poll.
+
+        Returns:
+            float: The interval until the next poll (0.0 if the sensor was removed).
+        """
+        state = self._states.get(sensor_id)
+        if state is None:
+            return 0.0
+
+        if value is not None and math.isfinite(value):
+            if state.samples == 0:
+                state.mean = value
+            else:
+                delta = value - state.mean
+                state.mean += self.alpha * delta
+                state.variance = (1 - self.alpha) * (state.variance + self.alpha * delta * delta)
+            state.samples += 1
+        if alerting is not None:
+            state.alerting = alerting
+
+        policy = state.policy
+        if state.alerting:
+            interval = policy.min_interval
+        else:
+            stddev = math.sqrt(state.variance)
+            interval = policy.base_interval / (1.0 + stddev / policy.volatility_scale)
+            interval = min(policy.max_interval, max(policy.min_interval, interval))
+
+        state.interval = interval
+        state.version = next(self._versions)
+        self._dirty.add(sensor_id)
+        heapq.heappush(self._heap, (now + interval, state.version, sensor_id))
+        return interval
+
+    def next_due(self) -> Optional[float]:
+        """
+        Earliest due time among scheduled sensors (None if nothing is scheduled).
+        """
+        heap = self._heap
+        while heap:
+            due_at, version, sensor_id = heap[0]
+            state = self._states.get(sensor_id)
+            if state is not None and state.version == version:
+                return due_at
+            heapq.heappop(heap)
+        return None
+
+    def state_dtype(self) -> np.dtype:
+        return STATE_DTYPE
+
+    def export_state(self, chunk_size: int = 4096, changed_only: bool = False) -> Iterator[np.ndarray]:
+        """
+        Learned per-sensor state as ``STATE_DTYPE`` records, ``chunk_size``
+        sensors at a time so a caller can yield to the event loop between
+        chunks. With ``changed_only``, just the sensors completed since the
+        previous export; otherwise restored state of sensors not added yet
+        is included too. Sensors removed mid-export are skipped.
+        """
+        sensor_ids = list(self._dirty if changed_only else self._states)
+        self._dirty = set()
+        for start in range(0, len(sensor_ids), chunk_size):
+            rows = []
+            for sensor_id in sensor_ids[start:start + chunk_size]:
+                state = self._states.get(sensor_id)
+                if state is not None:
+                    rows.append((sensor_id, state.mean, state.variance, state.samples,
+                                 state.alerting, state.interval))
+            yield np.array(rows, dtype=STATE_DTYPE)
+        if not changed_only:
+            yield from self._restored.pending(self._states)
+
+    def restore_state(self, records: np.ndarray) -> int:
+        """
+        Load records from ``export_state``; later calls take precedence.
+
+        Known sensors are updated in place. The other records stay in
+        ``records`` (e.g. a memory-mapped snapshot) and are applied when
+        their sensor is added.
+
+        Returns:
+            int: Number of records loaded.
+        """
+        sensor_ids = self._restored.add(records)
+        for sensor_id in [s for s in sensor_ids if s in self._states]:
+            record = self._restored.take(sensor_id)
+            if record is not None:
+                self._apply(self._states[sensor_id], record)
+        return len(records)
+
+    @staticmethod
+    def _apply(state: _SensorState, record: np.void) -> None:
+        state.mean = float(record["mean"])
+        state.variance = float(record["variance"])
+        state.samples = int(record["samples"])
+        state.alerting = bool(record["alerting"])
+
+    def demand(self) -> float:
+        """
+        Polls per second the current intervals would need without a budget.
+        """
+        return sum(1.0 / state.interval for state in self._states.values())
@@ -4,6 +4,15 @@ import random
 from typing import Dict, List
 
 from ingestion.generator import sensor_stream_simulator
+from telemetry.instrumentation import timed
+from telemetry.metrics import REGISTRY
+
+_READINGS_INGESTED = REGISTRY.counter(
+    "citypulse_readings_ingested_total", "Sensor readings taken in by poll_sector or the network gateway."
+)
+_SECTOR_POLLS = REGISTRY.counter(
+    "citypulse_sector_polls_total", "Completed poll_sector calls."
+)
 
 
 async def poll_sensor(sensor_id: str, delay_seconds: float = 0.1) -> Dict[str, float]:
@@ -28,6 +37,7 @@ async def poll_sensor(sensor_id: str, delay_seconds: float = 0.1) -> Dict[str, f
     return reading
 
 
+@timed("ingest")
 async def poll_sector(sensor_ids: List[str], delay_seconds: float = 0.1) -> List[Dict[str, float]]:
     """
     Poll multiple sensors concurrently using asyncio.gather().
@@ -49,4 +59,7 @@ async def poll_sector(sensor_ids: List[str], delay_seconds: float = 0.1) -> List
 
     # Run all sensor polls concurrently
     results = await asyncio.gather(*tasks)
+
+    _READINGS_INGESTED.inc(len(results))
+    _SECTOR_POLLS.inc()
     return results
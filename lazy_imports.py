@@ -0,0 +1,40 @@
+"""
+PEP 562 lazy attribute loading for package ``__init__`` modules.
+
+Standard library only, so packages can use it without pulling in anything heavy.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+
+def lazy_attrs(
+    namespace: Dict[str, Any], module_map: Mapping[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Build a package's module-level ``__getattr__`` and ``__dir__``.
+
+    Args:
+        namespace (Dict[str, Any]): The package's ``globals()``; resolved
+            names are cached there so later lookups skip ``__getattr__``.
+        module_map (Mapping[str, str]): Attribute name -> module defining it.
+
+    Returns:
+        Tuple[Callable, Callable]: ``(__getattr__, __dir__)`` for the package.
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = module_map.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {namespace['__name__']!r} has no attribute {name!r}")
+
+        value = getattr(importlib.import_module(module_name), name)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(namespace.get("__all__", ())))
+
+    return __getattr__, __dir__
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
 import os
 import sqlite3
-from typing import List
+from typing import List, Sequence
 
 from analytics import SensorCache, force_cleanup, calculate_heatmap_index
 from analytics.strategies import WiFiStrategy, LoRaWanStrategy
@@ -23,6 +24,7 @@ from sensors import DeviceFactory, TrafficSensor, FireSensor
 
 LOG_BASE_DIR = os.path.join(os.getcwd(), "var", "logs")
 DEFAULT_POLL_DELAY = 0.1
+INSTANCE_ENV_VAR = "CITYPULSE_INSTANCE"
 SAMPLE_SENSORS = ["TrafficSensor", "TrafficSensor", "TrafficSensor"]
 
 
@@ -105,6 +107,13 @@ def run_architecture_demo() -> None:
     print(f"[Sensors] Traffic reading: {traffic_sensor.read_stream()}")
     print(f"[Sensors] Fire reading: {fire_sensor.read_stream()}")
 
+    # Fleet inventory: registration and health from each sensor's health_check()
+    from core.catalog import DeviceCatalog
+
+    catalog = DeviceCatalog()
+    unhealthy = catalog.check_health([traffic_sensor, fire_sensor])
+    print(f"[Catalog] {len(catalog)} sensors, {unhealthy} unhealthy: {catalog.counts_by('sensor_type')}")
+
     # Strategy pattern
     data = "X" * 100
     wifi = WiFiStrategy()
@@ -161,5 +170,130 @@ async def main() -> None:
     print("=== CityPulse IoT Demo Finished ===")
 
 
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="citypulse")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("demo", help="Run the feature demo once (default)")
+
+    serve_parser = commands.add_parser("serve", help="Run the continuous ingestion service")
+    serve_parser.add_argument("--sensors", type=int, default=100)
+    serve_parser.add_argument("--sector-size", type=int, default=50)
+    serve_parser.add_argument("--poll-interval", type=float, default=1.0)
+    serve_parser.add_argument("--poll-delay", type=float, default=DEFAULT_POLL_DELAY)
+    serve_parser.add_argument("--poll-concurrency", type=int, default=4)
+    serve_parser.add_argument("--queue-size", type=int, default=64)
+    serve_parser.add_argument("--analytics-workers", type=int, default=2)
+    serve_parser.add_argument("--sink-workers", type=int, default=2)
+    serve_parser.add_argument("--drain-timeout", type=float, default=25.0)
+    serve_parser.add_argument("--adaptive", action="store_true",
+                              help="Per-sensor poll intervals from volatility, alerts and type")
+    serve_parser.add_argument("--poll-budget", type=float, default=None,
+                              help="Max polls/second for this pod (adaptive mode)")
+    serve_parser.add_argument("--dedup-window", type=int, default=0,
+                              help="Drop duplicate/late readings within this many sequences per sensor")
+    serve_parser.add_argument("--reorder-jitter", type=float, default=0.0,
+                              help="Seconds to hold readings so out-of-order arrivals are re-sequenced")
+    serve_parser.add_argument("--state-dir", default=None,
+                              help="Snapshot scheduler/dedup state here and restore it on start")
+    serve_parser.add_argument("--snapshot-interval", type=float, default=30.0)
+    serve_parser.add_argument("--instance", default=os.environ.get(INSTANCE_ENV_VAR),
+                              help="Snapshot name for this pod (default: $CITYPULSE_INSTANCE)")
+    serve_parser.add_argument("--db", default=None, help="SQLite file for stored readings")
+    serve_parser.add_argument("--config", default=None,
+                              help="JSON config file, reloaded when it changes and on SIGHUP")
+    serve_parser.add_argument("--metrics-port", type=int, default=8000)
+    serve_parser.add_argument("--udp-port", type=int, default=None,
+                              help="Accept binary device datagrams on this port")
+    serve_parser.add_argument("--tcp-port", type=int, default=None,
+                              help="Accept binary or CSV-line device streams on this port")
+    serve_parser.add_argument("--device-rate", type=float, default=None,
+                              help="Per-device records/second limit for pushed readings")
+    serve_parser.add_argument("--workers", type=int, default=1,
+                              help="Worker processes, each owning a hash slice of sensors")
+
+    replay_parser = commands.add_parser("replay", help="Recompute analytics over stored readings")
+    replay_parser.add_argument("--db", required=True, help="SQLite file written by serve --db")
+    replay_parser.add_argument("--output", default=None,
+                               help="Write results to this SQLite file instead of updating --db")
+    replay_parser.add_argument("--start", type=float, default=None, help="Unix time (inclusive)")
+    replay_parser.add_argument("--end", type=float, default=None, help="Unix time (exclusive)")
+    replay_parser.add_argument("--workers", type=int, default=None)
+    replay_parser.add_argument("--chunk-seconds", type=float, default=3600.0)
+    replay_parser.add_argument("--fire-threshold", type=float, default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == "serve" and args.workers > 1:
+        # Worker processes only poll their own hash slice; pushed readings
+        # would have to be routed to the owning shard, which is not supported.
+        pushed = [flag for flag, value in (("--udp-port", args.udp_port), ("--tcp-port", args.tcp_port),
+                                           ("--device-rate", args.device_rate)) if value is not None]
+        if pushed:
+            serve_parser.error(f"{', '.join(pushed)} cannot be combined with --workers > 1")
+    return args
+
+
+def run_cli(argv: Sequence[str] | None = None) -> None:
+    """
+    ``python main.py [demo]`` runs the demo; ``python main.py serve`` runs the service;
+    ``python main.py replay`` re-analyses stored readings.
+    """
+    args = parse_args(argv)
+
+    if args.command == "replay":
+        from service.replay import ReplayEngine
+
+        engine = ReplayEngine(
+            args.db,
+            target=args.output,
+            workers=args.workers,
+            chunk_seconds=args.chunk_seconds,
+            fire_threshold=args.fire_threshold,
+        )
+        stats = engine.run(args.start, args.end)
+        print(
+            f"[Replay] {stats.readings} readings in {stats.chunks} chunks, "
+            f"{stats.alerts} over threshold, {stats.readings_per_second:,.0f} readings/s"
+        )
+        return
+
+    if args.command != "serve":
+        asyncio.run(main())
+        return
+
+    from service import PipelineSettings, serve, serve_sharded
+
+    settings = PipelineSettings(
+        sensor_count=args.sensors,
+        sector_size=args.sector_size,
+        poll_interval=args.poll_interval,
+        poll_delay=args.poll_delay,
+        poll_concurrency=args.poll_concurrency,
+        queue_size=args.queue_size,
+        analytics_workers=args.analytics_workers,
+        sink_workers=args.sink_workers,
+        drain_timeout=args.drain_timeout,
+        adaptive=args.adaptive,
+        poll_budget=args.poll_budget,
+        dedup_window=args.dedup_window,
+        reorder_jitter=args.reorder_jitter,
+        state_dir=args.state_dir,
+        snapshot_interval=args.snapshot_interval,
+    )
+    if args.workers > 1:
+        serve_sharded(settings, args.workers, db_path=args.db, metrics_port=args.metrics_port,
+                      instance=args.instance or "", config_path=args.config)
+    else:
+        asyncio.run(serve(
+            settings,
+            db_path=args.db,
+            metrics_port=args.metrics_port,
+            udp_port=args.udp_port,
+            tcp_port=args.tcp_port,
+            device_rate=args.device_rate,
+            instance=args.instance or "pipeline",
+            config_path=args.config,
+        ))
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_cli()
@@ -7,6 +7,7 @@ import tracemalloc
 import asyncio
 
 from main import main
+from telemetry import MemoryTracker, SamplingProfiler, disable, enable, stage_summary
 
 
 def run_cpu_profile() -> None:
@@ -38,9 +39,47 @@ def run_memory_profile() -> None:
     print(f"Peak memory: {peak / 1024 / 1024:.2f} MB")
 
 
+def run_stage_profile() -> None:
+    """
+    Profile with the built-in instrumentation layer: per-stage latency
+    histograms, a sampling profiler and a tracemalloc diff around the run.
+    These are the same hooks a long-running service can toggle at runtime.
+    """
+    sampler = SamplingProfiler()
+    memory = MemoryTracker()
+
+    enable()
+    memory.start()
+    sampler.start()
+    try:
+        asyncio.run(main())
+    finally:
+        sampler.stop()
+        disable()
+
+    print("=== STAGE LATENCY ===")
+    for stage, summary in stage_summary().items():
+        print(
+            f"{stage:<10} n={summary['count']:<6} mean={summary['mean'] * 1000:.3f} ms "
+            f"p95<={summary['p95'] * 1000:.3f} ms"
+        )
+
+    print("=== SAMPLED HOTSPOTS (self time) ===")
+    for function, count in sampler.top(10):
+        print(f"{count:>6}  {function}")
+
+    print("=== MEMORY GROWTH (top 10) ===")
+    for stat in memory.diff(top=10):
+        print(stat)
+    memory.stop()
+
+
 if __name__ == "__main__":
     print("Running CPU profiling...")
     run_cpu_profile()
 
     print("\nRunning Memory profiling...")
     run_memory_profile()
+
+    print("\nRunning stage profiling...")
+    run_stage_profile()
@@ -4,15 +4,35 @@ Security package for CityPulse IoT.
 Includes:
 - encryption.py: Hashing and Fernet encryption utilities
 - sanitizer.py: SQL injection defense and file path sanitization
+
+Names are imported on first access (PEP 562); ``cryptography`` is only
+loaded once an encryption helper is used.
 """
 
-from security.encryption import (
-    generate_sha256,
-    generate_fernet_key,
-    encrypt_data,
-    decrypt_data,
-)
-from security.sanitizer import sanitize_filename, safe_log_path, get_sensor_by_id
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict
+
+from lazy_imports import lazy_attrs
+
+if TYPE_CHECKING:
+    from security.encryption import (
+        decrypt_data,
+        encrypt_data,
+        generate_fernet_key,
+        generate_sha256,
+    )
+    from security.sanitizer import get_sensor_by_id, safe_log_path, sanitize_filename
+
+_LAZY_ATTRS: Dict[str, str] = {
+    "generate_sha256": "security.encryption",
+    "generate_fernet_key": "security.encryption",
+    "encrypt_data": "security.encryption",
+    "decrypt_data": "security.encryption",
+    "sanitize_filename": "security.sanitizer",
+    "safe_log_path": "security.sanitizer",
+    "get_sensor_by_id": "security.sanitizer",
+}
 
 __all__ = [
     "generate_sha256",
@@ -23,3 +43,5 @@ __all__ = [
     "safe_log_path",
     "get_sensor_by_id",
 ]
+
+__getattr__, __dir__ = lazy_attrs(globals(), _LAZY_ATTRS)
@@ -3,14 +3,34 @@ Sensors package for CityPulse IoT.
 
 This package contains:
 - factory.py: DeviceFactory for creating sensor instances from the registry.
-- implementations.py: Concrete sensor implementations (e.g., TrafficSensor, FireSensor).
+- implementations.py: Concrete sensor implementations (e.g., TrafficSensor, FireSensor,
+  EnvironmentSensor).
+
+Submodules are imported on first attribute access (PEP 562).
 """
 
-from sensors.factory import DeviceFactory
-from sensors.implementations import TrafficSensor, FireSensor
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict
+
+from lazy_imports import lazy_attrs
+
+if TYPE_CHECKING:
+    from sensors.factory import DeviceFactory
+    from sensors.implementations import EnvironmentSensor, FireSensor, TrafficSensor
+
+_LAZY_ATTRS: Dict[str, str] = {
+    "DeviceFactory": "sensors.factory",
+    "TrafficSensor": "sensors.implementations",
+    "FireSensor": "sensors.implementations",
+    "EnvironmentSensor": "sensors.implementations",
+}
 
 __all__ = [
     "DeviceFactory",
     "TrafficSensor",
     "FireSensor",
+    "EnvironmentSensor",
 ]
+
+__getattr__, __dir__ = lazy_attrs(globals(), _LAZY_ATTRS)
@@ -2,6 +2,10 @@ from __future__ import annotations
 from core.meta import SensorMeta
 from core.interfaces import AbstractSensor
 
+# Built-in sensor types register themselves on import; the package no
+# longer imports them eagerly, so make sure the registry is populated.
+import sensors.implementations  # noqa: F401,E402
+
 
 class DeviceFactory:
     """
@@ -13,10 +17,8 @@ class DeviceFactory:
         if not sensor_type:
             raise ValueError("sensor_type must be provided")
 
-        registry = SensorMeta.get_registry()
-
-        if sensor_type not in registry:
+        sensor_class = SensorMeta.lookup(sensor_type)
+        if sensor_class is None:
             raise ValueError(f"Unknown sensor type: {sensor_type}")
 
-        sensor_class = registry[sensor_type]
         return sensor_class(device_id)
@@ -4,7 +4,7 @@ from typing import Dict, Any
 
 from core.interfaces import AbstractSensor
 from core.events import EmergencyResponseSystem
-from config import GridConfig
+from config import ConfigSnapshot, GridConfig
 
 
 ABSOLUTE_ZERO_CELSIUS: float = -273.15
@@ -15,6 +15,9 @@ class TrafficSensor(AbstractSensor):
     Simulates traffic density sensor.
     """
 
+    POLL_INTERVAL_SECONDS = 10.0
+    POLL_VOLATILITY_SCALE = 20.0
+
     def read_stream(self) -> Dict[str, Any]:
         cars_per_min = random.randint(0, 200)
         return {"cars_per_min": cars_per_min}
@@ -23,15 +26,55 @@ class TrafficSensor(AbstractSensor):
         return True
 
 
+class EnvironmentSensor(AbstractSensor):
+    """
+    Simulates a general air-quality sensor (temperature, humidity, CO2).
+
+    Keeps the default poll timing; the ingestion pipeline registers sensors
+    of unknown type under this class.
+    """
+
+    def read_stream(self) -> Dict[str, Any]:
+        return {
+            "temperature_celsius": random.uniform(15.0, 100.0),
+            "humidity_percent": random.uniform(10.0, 90.0),
+            "co2_ppm": random.uniform(300.0, 2000.0),
+        }
+
+    def health_check(self) -> bool:
+        return True
+
+
 class FireSensor(AbstractSensor):
     """
     Simulates a fire/temperature sensor and triggers alerts if threshold exceeded.
     """
 
-    def __init__(self, device_id: str, emergency_system: EmergencyResponseSystem):
+    POLL_INTERVAL_SECONDS = 2.0
+    MIN_POLL_INTERVAL_SECONDS = 0.1
+    MAX_POLL_INTERVAL_SECONDS = 10.0
+    POLL_VOLATILITY_SCALE = 2.0
+
+    def __init__(
+        self,
+        device_id: str,
+        emergency_system: EmergencyResponseSystem,
+        zone: str | None = None,
+    ):
         super().__init__(device_id)
         self._emergency_system = emergency_system
-        self._config = GridConfig()
+        self.zone = zone
+
+        # Cache the threshold; config pushes changes instead of per-read lookups
+        config = GridConfig()
+        config.subscribe(
+            self._on_config_change,
+            keys=("fire_threshold_celsius", "zone_fire_thresholds"),
+        )
+        self._threshold = config.snapshot.fire_threshold_for(zone)
+
+    def _on_config_change(self, old: ConfigSnapshot, new: ConfigSnapshot) -> None:
+        self._threshold = new.fire_threshold_for(self.zone)
 
     def read_stream(self) -> Dict[str, Any]:
         temperature = random.uniform(20.0, 120.0)
@@ -39,9 +82,7 @@ class FireSensor(AbstractSensor):
         if temperature < ABSOLUTE_ZERO_CELSIUS:
             raise ValueError("Invalid temperature: below absolute zero")
 
-        threshold = self._config.get("fire_threshold_celsius")
-
-        if temperature > threshold:
+        if temperature > self._threshold:
             self._emergency_system.notify_all(
                 f" FIRE ALERT from {self.device_id}: {temperature:.2f} °C"
             )
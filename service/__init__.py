@@ -0,0 +1,37 @@
+"""
+Service package for CityPulse IoT.
+
+Includes:
+- pipeline.py: Continuous poll -> analytics -> sink pipeline with bounded
+  queues and graceful drain
+- sinks.py: Alerting, in-memory and SQLite storage sinks
+- server.py: ``serve()`` entry point wiring signals and the metrics endpoint
+- sharding.py: Multi-process supervisor with consistent-hash sensor shards
+- replay.py: Parallel, idempotent re-analysis of stored readings
+- snapshot.py: Periodic state snapshots and memory-mapped warm restart
+"""
+
+from service.pipeline import AnalyzedBatch, IngestionPipeline, PipelineSettings, Sink
+from service.replay import ReplayEngine, ReplayStats
+from service.snapshot import StateSnapshotter
+from service.server import build_sinks, serve
+from service.sharding import ConsistentHashRing, ShardSupervisor, serve_sharded
+from service.sinks import AlertSink, MemorySink, SQLiteReadingSink
+
+__all__ = [
+    "AnalyzedBatch",
+    "IngestionPipeline",
+    "PipelineSettings",
+    "Sink",
+    "ReplayEngine",
+    "ReplayStats",
+    "StateSnapshotter",
+    "build_sinks",
+    "serve",
+    "ConsistentHashRing",
+    "ShardSupervisor",
+    "serve_sharded",
+    "AlertSink",
+    "MemorySink",
+    "SQLiteReadingSink",
+]
@@ -0,0 +1,525 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Protocol, Sequence
+
+import numpy as np
+
+from analytics.processor import calculate_heatmap_index
+from config import GridConfig
+from core.catalog import DeviceCatalog
+from ingestion.dedup import Deduplicator
+from ingestion.gateway import ReadingBatch, decode_ids
+from ingestion.scheduler import AdaptivePollScheduler
+from ingestion.stream import poll_sector
+from core.meta import SensorMeta
+from sensors.implementations import EnvironmentSensor
+from service.snapshot import StateSnapshotter
+from telemetry.metrics import REGISTRY
+
+Reading = Dict[str, Any]
+
+# Catalog type for polled sensors without a (known) type: default poll timing
+DEFAULT_SENSOR_TYPE = EnvironmentSensor.__name__
+
+_QUEUE_DEPTH_HELP = "Batches waiting in a pipeline queue."
+_BATCHES = REGISTRY.counter(
+    "citypulse_pipeline_batches_total", "Batches fully processed by the sinks."
+)
+_ALERTS = REGISTRY.counter(
+    "citypulse_pipeline_alerts_total", "Readings above the fire threshold."
+)
+_SINK_ERRORS = REGISTRY.counter(
+    "citypulse_pipeline_sink_errors_total", "Exceptions raised by sinks."
+)
+_DUPLICATES = REGISTRY.counter(
+    "citypulse_dedup_duplicates_total", "Readings dropped as retransmitted duplicates."
+)
+_LATE = REGISTRY.counter(
+    "citypulse_dedup_late_total", "Readings dropped as older than the dedup/reorder window."
+)
+_FORCED = REGISTRY.counter(
+    "citypulse_reorder_forced_total", "Readings released early because a reorder buffer was full."
+)
+# Shared with poll_sector: gateway readings count towards the HPA ingest-rate metric
+_INGESTED = REGISTRY.counter(
+    "citypulse_readings_ingested_total", "Sensor readings taken in by poll_sector or the network gateway."
+)
+_POLL_ERRORS = REGISTRY.counter(
+    "citypulse_pipeline_poll_errors_total", "Sector polls that raised; the sector is retried next round."
+)
+_ANALYTICS_ERRORS = REGISTRY.counter(
+    "citypulse_pipeline_analytics_errors_total", "Batches dropped because analysis raised."
+)
+
+
+@dataclass(frozen=True)
+class PipelineSettings:
+    """
+    Tuning knobs for the ingestion service.
+
+    ``queue_size`` bounds each inter-stage queue; when a queue is full the
+    upstream stage waits, so a slow sink eventually slows polling down
+    instead of growing memory.
+    """
+
+    sensor_count: int = 100
+    sector_size: int = 50
+    poll_interval: float = 1.0
+    poll_delay: float = 0.1
+    poll_concurrency: int = 4
+    queue_size: int = 64
+    analytics_workers: int = 2
+    sink_workers: int = 2
+    drain_timeout: float = 25.0
+    # Adaptive mode: per-sensor intervals instead of fixed poll_interval rounds
+    adaptive: bool = False
+    poll_budget: Optional[float] = None  # max polls/second for this pod
+    # Dedup/reorder: sequence window per sensor (0 disables) and jitter buffer delay
+    dedup_window: int = 0
+    reorder_jitter: float = 0.0
+    reorder_buffer: int = 64
+    # Warm restart: snapshot scheduler/dedup state here (None disables)
+    state_dir: Optional[str] = None
+    snapshot_interval: float = 30.0
+
+    def __post_init__(self) -> None:
+        for name in ("sector_size", "poll_concurrency", "queue_size",
+                     "analytics_workers", "sink_workers"):
+            if getattr(self, name) <= 0:
+                raise ValueError(f"{name} must be positive")
+        if self.sensor_count < 0:
+            raise ValueError("sensor_count must be non-negative")
+        for name in ("poll_interval", "poll_delay", "drain_timeout"):
+            if getattr(self, name) < 0:
+                raise ValueError(f"{name} must be non-negative")
+        if self.poll_budget is not None and self.poll_budget <= 0:
+            raise ValueError("poll_budget must be positive")
+        if self.dedup_window < 0 or self.reorder_jitter < 0 or self.reorder_buffer <= 0:
+            raise ValueError("Invalid dedup/reorder settings")
+        if self.snapshot_interval <= 0:
+            raise ValueError("snapshot_interval must be positive")
+
+
+@dataclass
+class AnalyzedBatch:
+    """
+    One polled sector after the analytics stage.
+    """
+
+    readings: Sequence[Reading]
+    heatmap_index: np.ndarray
+    alert_positions: List[int] = field(default_factory=list)
+
+
+class Sink(Protocol):
+    """
+    Final pipeline stage. ``handle`` is awaited once per analyzed batch;
+    ``close`` is awaited after the pipeline has drained.
+    """
+
+    async def handle(self, batch: AnalyzedBatch) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+def analyze_batch(
+    readings: Sequence[Reading], zone_of: Optional[Callable[[str], Optional[str]]] = None
+) -> AnalyzedBatch:
+    """
+    Vectorized heatmap index and fire-threshold check for one batch.
+
+    Columnar batches (anything with a ``column(name)`` method, such as the
+    gateway's ``ReadingBatch``) are used as-is without touching each reading.
+    With ``zone_of`` (sensor ID -> zone) and zone thresholds configured, each
+    reading is checked against its zone's threshold.
+    """
+    column = getattr(readings, "column", None)
+    if column is not None:
+        temperature = column("temperature_celsius")
+        humidity = column("humidity_percent")
+        co2 = column("co2_ppm")
+    else:
+        count = len(readings)
+        temperature = np.fromiter((r["temperature_celsius"] for r in readings), np.float64, count)
+        humidity = np.fromiter((r["humidity_percent"] for r in readings), np.float64, count)
+        co2 = np.fromiter((r["co2_ppm"] for r in readings), np.float64, count)
+
+    index = calculate_heatmap_index(temperature, humidity, co2)
+    snapshot = GridConfig().snapshot
+    threshold: Any = snapshot.fire_threshold_celsius
+    if zone_of is not None and snapshot.zone_fire_thresholds:
+        sensor_ids = (
+            decode_ids(column("sensor_id")) if column is not None
+            else [reading["sensor_id"] for reading in readings]
+        )
+        threshold = np.fromiter(
+            (snapshot.fire_threshold_for(zone_of(sensor_id)) for sensor_id in sensor_ids),
+            np.float64, len(sensor_ids),
+        )
+    alerts = np.flatnonzero(temperature > threshold).tolist()
+    return AnalyzedBatch(readings=readings, heatmap_index=index, alert_positions=alerts)
+
+
+class IngestionPipeline:
+    """
+    Continuous pipeline: poll scheduler -> bounded queue -> analytics
+    workers -> bounded queue -> sink workers.
+
+    ``request_stop()`` (wired to SIGTERM by the service entry point) stops
+    the scheduler from starting new polls; everything already polled is
+    pushed through analytics and the sinks before ``run()`` returns.
+
+    ``catalog`` holds the polled sensors (``sensor_ids``, typed by
+    ``sensor_types`` and placed by ``sensor_zones``): polls are sectored
+    from it, alerts use its zones' fire thresholds, and every poll or pushed
+    reading updates a sensor's last-seen time and health.
+    """
+
+    def __init__(
+        self,
+        settings: PipelineSettings,
+        sinks: Sequence[Sink],
+        sensor_ids: Optional[Sequence[str]] = None,
+        sensor_types: Optional[Mapping[str, str]] = None,
+        instance: str = "pipeline",
+        sensor_zones: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        if not sinks:
+            raise ValueError("At least one sink is required")
+        self.settings = settings
+        self.sinks = list(sinks)
+        self.sensor_types: Dict[str, str] = dict(sensor_types or {})
+        self.sensor_zones: Dict[str, str] = dict(sensor_zones or {})
+        self.catalog = DeviceCatalog()
+        self._sensor_ids: List[str] = []
+        self.sensor_ids = (
+            list(sensor_ids) if sensor_ids is not None
+            else [f"SENSOR-{i}" for i in range(1, settings.sensor_count + 1)]
+        )
+        self.poll_scheduler = AdaptivePollScheduler(settings.poll_budget)
+        self.deduplicator: Optional[Deduplicator] = None
+        if settings.dedup_window:
+            self.deduplicator = Deduplicator(
+                settings.dedup_window, settings.reorder_jitter, settings.reorder_buffer
+            )
+        self.snapshotter: Optional[StateSnapshotter] = None
+        if settings.state_dir is not None:
+            sources: Dict[str, Any] = {"scheduler": self.poll_scheduler}
+            if self.deduplicator is not None:
+                sources["dedup"] = self.deduplicator
+            self.snapshotter = StateSnapshotter(settings.state_dir, sources, instance)
+        self.polled = 0
+        self.delivered = 0
+        self.poll_errors = 0
+        self._stopping: asyncio.Event | None = None
+        self._raw: asyncio.Queue[List[Reading]] | None = None
+        self._analyzed: asyncio.Queue[AnalyzedBatch] | None = None
+
+    @property
+    def sensor_ids(self) -> List[str]:
+        return self._sensor_ids
+
+    @sensor_ids.setter
+    def sensor_ids(self, sensor_ids: Sequence[str]) -> None:
+        """
+        May be replaced while running (e.g. shard rebalancing); the catalog
+        follows, and the schedulers pick the change up on their next round.
+        """
+        sensor_ids = list(sensor_ids)
+        wanted = set(sensor_ids)
+        for device_id in self.catalog.query().tolist():
+            if device_id not in wanted:
+                self.catalog.remove(device_id)
+        for sensor_id in sensor_ids:
+            if sensor_id not in self.catalog:
+                sensor_type = self.sensor_types.get(sensor_id)
+                if sensor_type is None or SensorMeta.lookup(sensor_type) is None:
+                    sensor_type = DEFAULT_SENSOR_TYPE  # unknown types keep the default policy
+                self.catalog.register(sensor_id, sensor_type, zone=self.sensor_zones.get(sensor_id))
+        self._sensor_ids = sensor_ids
+
+    def _mark_seen(self, readings: Sequence[Reading]) -> None:
+        if not len(self.catalog):
+            return
+        if isinstance(readings, ReadingBatch):
+            device_ids = decode_ids(readings.column("sensor_id"))
+        else:
+            device_ids = [reading["sensor_id"] for reading in readings]
+        self.catalog.mark_seen(device_ids, time.time())
+
+    def _set_health(self, sensor_ids: Sequence[str], health: str) -> None:
+        catalog = self.catalog
+        for sensor_id in sensor_ids:
+            if sensor_id in catalog:  # may have been reassigned mid-poll
+                catalog.set_health(sensor_id, health)
+
+    def request_stop(self) -> None:
+        if self._stopping is not None:
+            self._stopping.set()
+
+    def _accepting(self) -> bool:
+        if self._raw is None:
+            raise RuntimeError("Pipeline is not running")
+        # After request_stop() the drain only covers what is already queued
+        return self._stopping is None or not self._stopping.is_set()
+
+    async def submit(self, readings: Sequence[Reading]) -> bool:
+        """
+        Feed an externally received batch (e.g. from the network gateway)
+        into the analytics stage. Waits while the queue is full.
+
+        Returns:
+            bool: False (batch not taken) once the pipeline is stopping.
+        """
+        if not self._accepting():
+            return False
+        self.polled += len(readings)
+        _INGESTED.inc(len(readings))
+        self._mark_seen(readings)
+        readings = self._deduplicate(readings)
+        if readings:
+            await self._raw.put(readings)  # type: ignore[arg-type, union-attr]
+        return True
+
+    def try_submit(self, readings: Sequence[Reading]) -> bool:
+        """
+        Non-blocking ``submit``; returns False (batch not taken) when full
+        or stopping.
+        """
+        if not self._accepting() or self._raw.full():  # type: ignore[union-attr]
+            return False
+        self.polled += len(readings)
+        _INGESTED.inc(len(readings))
+        self._mark_seen(readings)
+        readings = self._deduplicate(readings)
+        if readings:
+            self._raw.put_nowait(readings)  # type: ignore[arg-type, union-attr]
+        return True
+
+    def _deduplicate(self, readings: Sequence[Reading]) -> Sequence[Reading]:
+        """
+        Pass readings through the dedup/reorder stage, when enabled.
+        All producers run on the event loop, so the state needs no lock.
+        Gateway batches come back columnar (masked) unless they were reordered.
+        """
+        dedup = self.deduplicator
+        if dedup is None:
+            return readings
+        duplicates, late, forced = dedup.duplicates, dedup.late, dedup.forced
+        ready = dedup.push(readings, time.monotonic())
+        _DUPLICATES.inc(dedup.duplicates - duplicates)
+        _LATE.inc(dedup.late - late)
+        _FORCED.inc(dedup.forced - forced)
+        return ready
+
+    async def _reorder_flusher(self) -> None:
+        """
+        Periodically move readings whose jitter delay expired downstream.
+        """
+        assert self._raw is not None and self.deduplicator is not None
+        period = max(0.005, self.settings.reorder_jitter / 2)
+        while True:
+            await asyncio.sleep(period)
+            ready = self.deduplicator.release(time.monotonic())
+            if ready:
+                await self._raw.put(ready)
+
+    def _sectors(self) -> List[List[str]]:
+        return [sector.tolist() for sector in self.catalog.sectors(self.settings.sector_size)]
+
+    async def _poll_one(self, sector: List[str], limiter: asyncio.Semaphore) -> List[Reading]:
+        assert self._raw is not None
+        async with limiter:
+            try:
+                readings = await poll_sector(sector, delay_seconds=self.settings.poll_delay)
+            except Exception as exc:  # one bad sector must not stop the others
+                self.poll_errors += 1
+                _POLL_ERRORS.inc()
+                self._set_health(sector, "unhealthy")
+                print(f"[Service] Poll of {len(sector)} sensors from {sector[0]} failed: {exc}")
+                return []
+        now = time.time()
+        for reading in readings:
+            reading["timestamp"] = now
+        self.polled += len(readings)
+        self._mark_seen(readings)
+        self._set_health([reading["sensor_id"] for reading in readings], "healthy")
+        ready = self._deduplicate(readings)
+        if ready:
+            await self._raw.put(ready)  # blocks when analytics falls behind
+        return readings
+
+    async def _scheduler(self) -> None:
+        assert self._stopping is not None
+        limiter = asyncio.Semaphore(self.settings.poll_concurrency)
+        loop = asyncio.get_running_loop()
+
+        while not self._stopping.is_set():
+            started = loop.time()
+            sectors = self._sectors()
+            await asyncio.gather(*(self._poll_one(sector, limiter) for sector in sectors))
+
+            remaining = self.settings.poll_interval - (loop.time() - started)
+            if not sectors:
+                remaining = max(remaining, 0.05)  # idle shard: don't spin
+            if remaining > 0:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _poll_adaptive(self, sector: List[str], limiter: asyncio.Semaphore) -> None:
+        scheduler = self.poll_scheduler
+        loop = asyncio.get_running_loop()
+        readings = await self._poll_one(sector, limiter)
+
+        now = loop.time()
+        snapshot = GridConfig().snapshot
+        answered = set()
+        for reading in readings:
+            sensor_id = reading["sensor_id"]
+            temperature = reading["temperature_celsius"]
+            threshold = snapshot.fire_threshold_for(self.catalog.zone_of(sensor_id))
+            scheduler.complete(sensor_id, now, temperature, temperature > threshold)
+            answered.add(sensor_id)
+        for sensor_id in sector:
+            if sensor_id not in answered:  # failed poll: reschedule without a sample
+                scheduler.complete(sensor_id, now)
+
+    async def _adaptive_scheduler(self) -> None:
+        """
+        Poll each sensor when its own interval expires (see
+        ``AdaptivePollScheduler``), grouping due sensors into sectors.
+        """
+        assert self._stopping is not None
+        scheduler = self.poll_scheduler
+        limiter = asyncio.Semaphore(self.settings.poll_concurrency)
+        loop = asyncio.get_running_loop()
+        size = self.settings.sector_size
+        known: List[str] | None = None
+        in_flight: set[asyncio.Task[None]] = set()
+
+        while not self._stopping.is_set():
+            if self.sensor_ids is not known:  # first round or shard reassignment
+                known = self.sensor_ids
+                types = {sensor_id: self.catalog.get(sensor_id).sensor_type for sensor_id in known}
+                scheduler.set_sensors(known, types, loop.time())
+
+            due = scheduler.pop_due(loop.time())
+            for start in range(0, len(due), size):
+                task = asyncio.create_task(self._poll_adaptive(due[start:start + size], limiter))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+            next_due = scheduler.next_due()
+            wait = 0.05 if next_due is None else next_due - loop.time()
+            if scheduler.max_polls_per_second is not None:
+                wait = max(wait, 1.0 / scheduler.max_polls_per_second)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=min(1.0, max(0.001, wait)))
+            except asyncio.TimeoutError:
+                pass
+
+        # Readings already being polled still go downstream before draining
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def _analytics_worker(self) -> None:
+        assert self._raw is not None and self._analyzed is not None
+        while True:
+            readings = await self._raw.get()
+            try:
+                try:
+                    batch = analyze_batch(readings, self.catalog.zone_of)
+                except Exception as exc:  # drop the batch, keep the worker (and the drain) alive
+                    _ANALYTICS_ERRORS.inc()
+                    print(f"[Service] Analysis of {len(readings)} readings failed: {exc}")
+                    continue
+                _ALERTS.inc(len(batch.alert_positions))
+                await self._analyzed.put(batch)
+            finally:
+                self._raw.task_done()
+
+    async def _sink_worker(self) -> None:
+        assert self._analyzed is not None
+        while True:
+            batch = await self._analyzed.get()
+            try:
+                for sink in self.sinks:
+                    try:
+                        await sink.handle(batch)
+                    except Exception as exc:  # keep draining even if one sink fails
+                        _SINK_ERRORS.inc()
+                        print(f"[Service] Sink {type(sink).__name__} failed: {exc}")
+                self.delivered += len(batch.readings)
+                _BATCHES.inc()
+            finally:
+                self._analyzed.task_done()
+
+    async def run(self) -> None:
+        """
+        Run until ``request_stop()`` is called, then drain and close sinks.
+        """
+        settings = self.settings
+        self._stopping = asyncio.Event()
+        self._raw = asyncio.Queue(maxsize=settings.queue_size)
+        self._analyzed = asyncio.Queue(maxsize=settings.queue_size)
+
+        raw, analyzed = self._raw, self._analyzed
+        for name, queue in (("raw", raw), ("analyzed", analyzed)):
+            REGISTRY.gauge(
+                "citypulse_queue_depth", _QUEUE_DEPTH_HELP, {"queue": name}
+            ).set_function(queue.qsize)
+
+        workers = [
+            asyncio.create_task(self._analytics_worker())
+            for _ in range(settings.analytics_workers)
+        ]
+        workers += [
+            asyncio.create_task(self._sink_worker()) for _ in range(settings.sink_workers)
+        ]
+        if self.snapshotter is not None:
+            restored = self.snapshotter.restore()
+            if restored:
+                print(f"[Service] Restored state: {restored}")
+            workers.append(asyncio.create_task(self.snapshotter.run(settings.snapshot_interval)))
+        scheduler = asyncio.create_task(
+            self._adaptive_scheduler() if settings.adaptive else self._scheduler()
+        )
+
+        flusher = None
+        if self.deduplicator is not None and settings.reorder_jitter:
+            flusher = asyncio.create_task(self._reorder_flusher())
+            workers.append(flusher)
+
+        try:
+            await scheduler
+            if flusher is not None:
+                flusher.cancel()
+                remaining = self.deduplicator.release(time.monotonic(), force=True)
+                if remaining:
+                    await raw.put(remaining)
+            await asyncio.wait_for(self._drain(), timeout=settings.drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"[Service] Drain timed out with {raw.qsize()} + {analyzed.qsize()} batches queued")
+        finally:
+            scheduler.cancel()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(scheduler, *workers, return_exceptions=True)
+            if self.snapshotter is not None:
+                try:
+                    await self.snapshotter.snapshot()
+                except OSError as exc:
+                    print(f"[Service] Final state snapshot failed: {exc}")
+            for sink in self.sinks:
+                await sink.close()
+
+    async def _drain(self) -> None:
+        assert self._raw is not None and self._analyzed is not None
+        await self._raw.join()
+        await self._analyzed.join()
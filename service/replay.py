@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import math
+import multiprocessing as mp
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from analytics.processor import calculate_heatmap_index
+from config import GridConfig
+from service.sinks import SQLiteReadingSink
+
+Chunk = Tuple[float, float]
+
+_SELECT = (
+    "SELECT rowid, sensor_id, timestamp, temperature_celsius, humidity_percent, co2_ppm "
+    "FROM readings WHERE timestamp >= ? AND timestamp < ?"
+)
+_UPDATE = "UPDATE readings SET heatmap_index = ? WHERE rowid = ?"
+_TIMESTAMP_INDEX = "CREATE INDEX IF NOT EXISTS readings_timestamp ON readings (timestamp)"
+
+
+@dataclass(frozen=True)
+class ChunkResult:
+    start: float
+    end: float
+    readings: int
+    alerts: int
+
+
+@dataclass(frozen=True)
+class ChunkOutput:
+    result: ChunkResult
+    index: np.ndarray
+    rowids: Optional[np.ndarray] = None  # in place: the rows to update
+    # Separate target: full rows (sensor_id, timestamp, temperature, humidity, co2)
+    rows: Optional[List[Tuple[Any, ...]]] = None
+
+
+@dataclass
+class ReplayStats:
+    chunks: int = 0
+    readings: int = 0
+    alerts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def readings_per_second(self) -> float:
+        return self.readings / self.seconds if self.seconds else 0.0
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    # Same busy timeout as the service, which may be writing to the same file
+    return sqlite3.connect(path, timeout=30.0)
+
+
+def analyse_chunk(
+    source: str, start: float, end: float, threshold: float, in_place: bool = True
+) -> ChunkOutput:
+    """
+    Recompute the heatmap index for one time range of stored readings.
+
+    Rows are read in one query and analysed as whole columns. Runs in the
+    worker processes; the results are written by the engine. For an in-place
+    replay only row IDs and index values are sent back, as two arrays.
+    """
+    with _connect(source) as conn:
+        rows = conn.execute(_SELECT, (start, end)).fetchall()
+    if not rows:
+        return ChunkOutput(ChunkResult(start, end, 0, 0), np.empty(0))
+
+    columns = list(zip(*rows))
+    temperature, humidity, co2 = (np.array(c, dtype=np.float64) for c in columns[3:])  # NULL -> nan
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        index = calculate_heatmap_index(temperature, humidity, co2)
+        alerts = int(np.count_nonzero(temperature > threshold))
+
+    result = ChunkResult(start, end, len(rows), alerts)
+    if in_place:
+        return ChunkOutput(result, index, rowids=np.array(columns[0], dtype=np.int64))
+    return ChunkOutput(result, index, rows=[row[1:] for row in rows])
+
+
+class ReplayEngine:
+    """
+    Re-runs analytics over readings stored by ``SQLiteReadingSink``.
+
+    The requested time range is cut into ``chunk_seconds`` windows that are
+    processed as fast as the machine allows (no wall-clock pacing). A pool
+    of ``workers`` processes reads and analyses chunks; ``workers=1`` runs
+    inline. SQLite allows one writer at a time, so results are written by
+    this process only, one transaction per chunk, while the pool works on
+    the next chunks. At most ``2 * workers`` chunks are in flight, so memory
+    stays bounded when the writer falls behind.
+
+    In place, writes are an ``UPDATE`` of ``heatmap_index`` by row ID; into a
+    separate ``target`` they are ``INSERT OR REPLACE`` of the full row keyed
+    on (sensor_id, timestamp). Replaying a range twice, or restarting an
+    interrupted replay, leaves the same rows behind.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        target: Optional[str] = None,
+        workers: Optional[int] = None,
+        chunk_seconds: float = 3600.0,
+        fire_threshold: Optional[float] = None,
+    ) -> None:
+        if chunk_seconds <= 0:
+            raise ValueError("chunk_seconds must be positive")
+        if not os.path.exists(source):
+            raise ValueError(f"No readings database at {source}")
+        self.source = source
+        self.target = target or source
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_seconds = chunk_seconds
+        self.fire_threshold = (
+            fire_threshold if fire_threshold is not None
+            else GridConfig().snapshot.fire_threshold_celsius
+        )
+
+    def _prepare(self) -> Tuple[Optional[float], Optional[float]]:
+        with _connect(self.source) as conn:
+            # WAL (as SQLiteReadingSink uses) lets workers read while we write
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Chunk queries filter on timestamp alone; without this index each
+            # one would scan the whole table.
+            conn.execute(_TIMESTAMP_INDEX)
+            first, last = conn.execute("SELECT MIN(timestamp), MAX(timestamp) FROM readings").fetchone()
+        if self.target != self.source:
+            with _connect(self.target) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(SQLiteReadingSink.SCHEMA)
+        return first, last
+
+    def chunks(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Chunk]:
+        """
+        Time windows covering the stored readings within [start, end).
+        """
+        first, last = self._prepare()
+        if first is None:
+            return []
+        lo = max(first, start) if start is not None else first
+        hi = math.nextafter(last, math.inf)  # include the newest reading
+        if end is not None:
+            hi = min(hi, end)
+        windows: List[Chunk] = []
+        while lo < hi:
+            windows.append((lo, min(lo + self.chunk_seconds, hi)))
+            lo += self.chunk_seconds
+        return windows
+
+    def _write(self, conn: sqlite3.Connection, output: ChunkOutput) -> ChunkResult:
+        if len(output.index):
+            index = output.index.tolist()
+            with conn:
+                if output.rowids is not None:
+                    conn.executemany(_UPDATE, zip(index, output.rowids.tolist()))
+                else:
+                    conn.executemany(
+                        SQLiteReadingSink.INSERT,
+                        (row + (value,) for row, value in zip(output.rows or (), index)),
+                    )
+        return output.result
+
+    def _executor(self) -> Executor:
+        ctx = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+        if ctx.get_start_method() == "forkserver":
+            ctx.set_forkserver_preload(["service.replay"])
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+
+    def _bounded(self, pool: Executor, jobs: List[Tuple[Any, ...]]) -> Iterator[ChunkOutput]:
+        """
+        Results in completion order, keeping at most ``2 * workers`` chunks
+        submitted but not yet consumed.
+        """
+        pending = iter(jobs)
+        in_flight: Set[Future[ChunkOutput]] = set()
+        limit = 2 * self.workers
+        while True:
+            for job in pending:
+                in_flight.add(pool.submit(analyse_chunk, *job))
+                if len(in_flight) >= limit:
+                    break
+            if not in_flight:
+                return
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    def run(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        progress: Optional[Callable[[ChunkResult, ReplayStats], None]] = None,
+    ) -> ReplayStats:
+        """
+        Replay every chunk in [start, end) and return totals.
+        ``progress`` is called once per finished chunk.
+        """
+        windows = self.chunks(start, end)
+        stats = ReplayStats()
+        began = time.perf_counter()
+
+        def record(result: ChunkResult) -> None:
+            stats.chunks += 1
+            stats.readings += result.readings
+            stats.alerts += result.alerts
+            stats.seconds = time.perf_counter() - began
+            if progress is not None:
+                progress(result, stats)
+
+        in_place = self.target == self.source
+        jobs = [(self.source, lo, hi, self.fire_threshold, in_place) for lo, hi in windows]
+        writer = _connect(self.target)
+        try:
+            if self.workers == 1 or len(jobs) <= 1:
+                for job in jobs:
+                    record(self._write(writer, analyse_chunk(*job)))
+            else:
+                with self._executor() as pool:
+                    for output in self._bounded(pool, jobs):
+                        record(self._write(writer, output))
+        finally:
+            writer.close()
+
+        stats.seconds = time.perf_counter() - began
+        return stats
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import signal
+from typing import List, Optional
+
+from config import ConfigFileWatcher, install_sighup_reload
+from core.events import EmergencyResponseSystem
+from ingestion.gateway import DeviceRateLimiter, ReadingGateway
+from service.pipeline import IngestionPipeline, PipelineSettings, Sink
+from service.sinks import AlertSink, SQLiteReadingSink
+from telemetry.metrics import start_metrics_server
+
+
+class _ConsoleSubscriber:
+    def notify(self, message: str) -> None:
+        print(message)
+
+
+def build_sinks(db_path: Optional[str] = None) -> List[Sink]:
+    """
+    Default sinks: console alerts, plus SQLite storage when ``db_path`` is set.
+    """
+    emergency_system = EmergencyResponseSystem()
+    emergency_system.subscribe(_ConsoleSubscriber())
+
+    sinks: List[Sink] = [AlertSink(emergency_system)]
+    if db_path is not None:
+        sinks.append(SQLiteReadingSink(db_path))
+    return sinks
+
+
+def start_config_reload(path: str) -> ConfigFileWatcher:
+    """
+    Load ``path`` into ``GridConfig`` now, then reload it when it changes
+    or when the process receives SIGHUP. Stop the returned watcher on exit.
+
+    Raises:
+        OSError, ValueError: If the file cannot be read or is not a JSON object.
+    """
+    watcher = ConfigFileWatcher(path)
+    watcher.poll(force=True)
+    watcher.start()
+    try:
+        install_sighup_reload(path, watcher)
+    except ValueError:
+        pass  # not on the main thread: file changes are still picked up
+    return watcher
+
+
+async def serve(
+    settings: PipelineSettings,
+    db_path: Optional[str] = None,
+    metrics_port: Optional[int] = 8000,
+    udp_port: Optional[int] = None,
+    tcp_port: Optional[int] = None,
+    device_rate: Optional[float] = None,
+    instance: str = "pipeline",
+    config_path: Optional[str] = None,
+) -> IngestionPipeline:
+    """
+    Run the ingestion service until SIGTERM/SIGINT, then drain gracefully.
+
+    Args:
+        settings: Pipeline tuning.
+        db_path: SQLite file for stored readings (None disables storage).
+        metrics_port: Port for ``/metrics`` (None disables the endpoint).
+        udp_port: Gateway UDP port for device pushes (None disables it).
+        tcp_port: Gateway TCP port for device pushes (None disables it).
+        device_rate: Per-device records/second limit for gateway traffic.
+        instance: Name of this process's state snapshots (unique per pod
+            when pods share a state directory).
+        config_path: JSON config file, hot-reloaded on change and on SIGHUP.
+
+    Returns:
+        IngestionPipeline: The finished pipeline (for its counters).
+    """
+    watcher = start_config_reload(config_path) if config_path is not None else None
+    pipeline = IngestionPipeline(settings, build_sinks(db_path), instance=instance)
+
+    gateway: Optional[ReadingGateway] = None
+    if udp_port is not None or tcp_port is not None:
+        limiter = DeviceRateLimiter(device_rate, burst=max(1.0, device_rate)) if device_rate else None
+        gateway = ReadingGateway(pipeline.submit, pipeline.try_submit, limiter)
+
+    closing: List["asyncio.Future[None]"] = []
+
+    def stop() -> None:
+        # Stop taking device traffic first (open connections hand over what
+        # they already received), then let the pipeline drain
+        if gateway is None:
+            pipeline.request_stop()
+        elif not closing:
+            closing.append(asyncio.ensure_future(gateway.close()))
+            closing[0].add_done_callback(lambda _: pipeline.request_stop())
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stop)
+        except (NotImplementedError, RuntimeError):
+            pass  # e.g. Windows or not on the main thread
+
+    server = None
+    if metrics_port is not None:
+        server = await start_metrics_server(port=metrics_port)
+
+    run_task = asyncio.create_task(pipeline.run())
+    await asyncio.sleep(0)  # let the pipeline create its queues before devices connect
+    if gateway is not None:
+        if udp_port is not None:
+            await gateway.start_udp(port=udp_port)
+        if tcp_port is not None:
+            await gateway.start_tcp(port=tcp_port)
+        print(f"[Service] Gateway listening (udp={udp_port}, tcp={tcp_port})")
+
+    print(
+        f"[Service] Polling {settings.sensor_count} sensors every {settings.poll_interval}s "
+        f"({settings.analytics_workers} analytics / {settings.sink_workers} sink workers)"
+    )
+    try:
+        await run_task
+    finally:
+        if gateway is not None:
+            await gateway.close()
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+        if watcher is not None:
+            watcher.stop()
+
+    print(f"[Service] Drained: {pipeline.polled} polled, {pipeline.delivered} delivered")
+    return pipeline
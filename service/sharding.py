@@ -0,0 +1,474 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, replace
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from service.pipeline import IngestionPipeline, PipelineSettings
+from telemetry.instrumentation import enable as enable_stage_timers
+from telemetry.metrics import REGISTRY, LabelKey, start_metrics_server
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class ConsistentHashRing:
+    """
+    Consistent-hash ring with virtual nodes.
+
+    Removing a node only moves the keys that node owned; every other key
+    keeps its owner, so surviving shards keep warm state.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 64) -> None:
+        if vnodes <= 0:
+            raise ValueError("vnodes must be positive")
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes: set[str] = set()
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def add_node(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        self._rebuild()
+
+    def remove_node(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        ring = sorted(
+            (_hash(f"{node}#{replica}"), node)
+            for node in self._nodes
+            for replica in range(self.vnodes)
+        )
+        self._points = [point for point, _ in ring]
+        self._owners = [owner for _, owner in ring]
+
+    def node_for(self, key: str) -> str:
+        if not self._points:
+            raise ValueError("Ring has no nodes")
+        index = bisect_right(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Group ``keys`` by owning node (every node appears, possibly empty).
+        """
+        assignment: Dict[str, List[str]] = {node: [] for node in self._nodes}
+        for key in keys:
+            assignment[self.node_for(key)].append(key)
+        return assignment
+
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+
+def _worker_main(
+    shard: str,
+    sensor_ids: List[str],
+    settings: PipelineSettings,
+    db_path: Optional[str],
+    conn: Connection,
+    report_interval: float,
+    forward_metrics: bool = False,
+    instance: str = "",
+    config_path: Optional[str] = None,
+) -> None:
+    # The supervisor owns Ctrl-C and forwards SIGTERM (and SIGHUP) to workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if forward_metrics:
+        enable_stage_timers()  # their histograms are forwarded to /metrics
+    asyncio.run(
+        _worker_loop(
+            shard, sensor_ids, settings, db_path, conn, report_interval, forward_metrics, instance,
+            config_path,
+        )
+    )
+
+
+async def _worker_loop(
+    shard: str,
+    sensor_ids: List[str],
+    settings: PipelineSettings,
+    db_path: Optional[str],
+    conn: Connection,
+    report_interval: float,
+    forward_metrics: bool = False,
+    instance: str = "",
+    config_path: Optional[str] = None,
+) -> None:
+    from service.server import build_sinks, start_config_reload
+
+    watcher = start_config_reload(config_path) if config_path is not None else None
+    pipeline = IngestionPipeline(
+        settings, build_sinks(db_path), sensor_ids=sensor_ids,
+        instance=f"{instance}-{shard}" if instance else shard,
+    )
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, pipeline.request_stop)
+
+    def send_stats(final: bool = False) -> None:
+        try:
+            # Metric values are cumulative (the supervisor applies the
+            # difference) and travel with the stats they match.
+            metrics = REGISTRY.export_values() if forward_metrics else None
+            conn.send(
+                ("stats", shard, os.getpid(), pipeline.polled, pipeline.delivered, final, metrics)
+            )
+        except (BrokenPipeError, OSError):
+            pipeline.request_stop()
+
+    def on_message() -> None:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            loop.remove_reader(conn.fileno())
+            pipeline.request_stop()  # supervisor is gone
+            return
+        if message[0] == "assign":
+            pipeline.sensor_ids = list(message[1])
+            pipeline.poll_scheduler.set_budget(message[2])
+        elif message[0] == "stop":
+            pipeline.request_stop()
+
+    async def reporter() -> None:
+        while True:
+            await asyncio.sleep(report_interval)
+            send_stats()
+
+    loop.add_reader(conn.fileno(), on_message)
+    reporting = asyncio.create_task(reporter())
+    try:
+        await pipeline.run()
+    finally:
+        reporting.cancel()
+        loop.remove_reader(conn.fileno())
+        send_stats(final=True)
+        conn.close()
+        if watcher is not None:
+            watcher.stop()
+
+
+# ---------------------------------------------------------------------------
+# Supervisor
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ShardStats:
+    pid: int = 0
+    polled: int = 0
+    delivered: int = 0
+    restarts: int = 0
+    # Totals from previous (dead) incarnations of this shard
+    base_polled: int = 0
+    base_delivered: int = 0
+
+    @property
+    def total_polled(self) -> int:
+        return self.base_polled + self.polled
+
+    @property
+    def total_delivered(self) -> int:
+        return self.base_delivered + self.delivered
+
+
+class ShardSupervisor:
+    """
+    Runs one ingestion pipeline per worker process, each owning a
+    consistent-hash slice of the sensor IDs.
+
+    A worker that exits unexpectedly is restarted on the same slice. If a
+    shard keeps crashing (``max_restarts`` within ``restart_window``) it is
+    removed from the ring and its sensors are reassigned to the survivors.
+
+    ``settings.poll_budget`` is the pod's total: each live shard gets an
+    equal share, re-split when a shard is removed.
+
+    With ``forward_metrics`` workers also report their counters and stage
+    histograms, and the increments are added to the supervisor's registry,
+    so its ``/metrics`` shows the totals across all shards.
+    """
+
+    def __init__(
+        self,
+        settings: PipelineSettings,
+        workers: int,
+        db_path: Optional[str] = None,
+        sensor_ids: Optional[Sequence[str]] = None,
+        report_interval: float = 1.0,
+        max_restarts: int = 5,
+        restart_window: float = 60.0,
+        forward_metrics: bool = False,
+        instance: str = "",
+        config_path: Optional[str] = None,
+    ) -> None:
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        self.settings = settings
+        self.db_path = db_path
+        self.report_interval = report_interval
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.forward_metrics = forward_metrics
+        self.instance = instance  # prefix of the shards' state snapshot names
+        self.config_path = config_path  # each worker hot-reloads it
+        self.sensor_ids: List[str] = (
+            list(sensor_ids) if sensor_ids is not None
+            else [f"SENSOR-{i}" for i in range(1, settings.sensor_count + 1)]
+        )
+        self.ring = ConsistentHashRing(f"shard-{n}" for n in range(workers))
+        self.assignment = self.ring.assign(self.sensor_ids)
+        self.stats: Dict[str, ShardStats] = {shard: ShardStats() for shard in self.assignment}
+
+        # Workers are forked from a single-threaded fork server (with the
+        # pipeline modules preloaded), so the supervisor's metrics thread
+        # is never copied into a child.
+        if "forkserver" in mp.get_all_start_methods():
+            self._ctx = mp.get_context("forkserver")
+            self._ctx.set_forkserver_preload(["service.sharding"])
+        else:
+            self._ctx = mp.get_context("spawn")
+        self._processes: Dict[str, Any] = {}
+        self._conns: Dict[str, Connection] = {}
+        self._crashes: Dict[str, List[float]] = {shard: [] for shard in self.assignment}
+        self._stopping = threading.Event()
+        # Last cumulative metric values reported by each shard's current process
+        self._metric_values: Dict[str, Dict[Tuple[str, LabelKey], Tuple[float, ...]]] = {}
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def request_stop(self) -> None:
+        self._stopping.set()
+
+    def shard_budget(self) -> Optional[float]:
+        """
+        Polls/second each live shard may use (None when unlimited).
+        """
+        budget = self.settings.poll_budget
+        return None if budget is None else budget / len(self.ring.nodes)
+
+    def _spawn(self, shard: str) -> None:
+        parent_conn, child_conn = self._ctx.Pipe()
+        settings = replace(self.settings, poll_budget=self.shard_budget())
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(shard, self.assignment[shard], settings, self.db_path,
+                  child_conn, self.report_interval, self.forward_metrics, self.instance,
+                  self.config_path),
+            name=f"citypulse-{shard}",
+            daemon=False,
+        )
+        process.start()
+        child_conn.close()
+        self._processes[shard] = process
+        self._conns[shard] = parent_conn
+        self.stats[shard].pid = process.pid or 0
+        self._metric_values[shard] = {}
+
+    def start(self) -> None:
+        for shard in self.assignment:
+            self._spawn(shard)
+
+    def run(self) -> Dict[str, ShardStats]:
+        """
+        Start workers and supervise until ``request_stop()`` (or SIGTERM when
+        run from the main thread), then stop workers and wait for their drain.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.request_stop())
+            signal.signal(signal.SIGINT, lambda *_: self.request_stop())
+            if self.config_path is not None and hasattr(signal, "SIGHUP"):
+                signal.signal(signal.SIGHUP, lambda *_: self.signal_workers(signal.SIGHUP))
+
+        self.start()
+        while not self._stopping.is_set():
+            self.poll(timeout=0.2)
+        self.shutdown()
+        return self.stats
+
+    def signal_workers(self, signum: int) -> None:
+        for process in list(self._processes.values()):
+            if process.is_alive():
+                try:
+                    os.kill(process.pid, signum)
+                except ProcessLookupError:
+                    pass
+
+    def poll(self, timeout: float = 0.2) -> None:
+        """
+        Handle pending worker reports and restart dead workers once.
+        """
+        by_handle: Dict[Any, Tuple[str, str]] = {}
+        for shard, conn in self._conns.items():
+            by_handle[conn] = ("conn", shard)
+            by_handle[self._processes[shard].sentinel] = ("exit", shard)
+
+        for handle in wait(list(by_handle), timeout=timeout):
+            kind, shard = by_handle[handle]
+            if kind == "conn":
+                self._receive(shard)
+            elif not self._stopping.is_set():
+                self._handle_exit(shard)
+
+    def _receive(self, shard: str) -> None:
+        conn = self._conns.get(shard)
+        if conn is None:
+            return
+        try:
+            while conn.poll():
+                message = conn.recv()
+                if message[0] == "stats":
+                    _, _, pid, polled, delivered, _final, metrics = message
+                    stats = self.stats[shard]
+                    stats.pid, stats.polled, stats.delivered = pid, polled, delivered
+                    if metrics is not None:
+                        self._merge_metrics(shard, metrics)
+        except (EOFError, OSError):
+            pass
+
+    def _merge_metrics(self, shard: str, values: List[Tuple[Any, ...]]) -> None:
+        last = self._metric_values.setdefault(shard, {})
+        deltas = []
+        for name, kind, help_text, key, current in values:
+            previous = last.get((name, key))
+            if previous is not None and len(previous) == len(current):
+                increment = tuple(now - before for now, before in zip(current, previous))
+            else:
+                increment = current
+            last[(name, key)] = current
+            if any(increment):
+                deltas.append((name, kind, help_text, key, increment))
+        REGISTRY.apply_deltas(deltas)
+
+    def _handle_exit(self, shard: str) -> None:
+        process = self._processes.pop(shard)
+        process.join()
+        self._receive(shard)
+        self._conns.pop(shard).close()
+
+        stats = self.stats[shard]
+        stats.base_polled += stats.polled
+        stats.base_delivered += stats.delivered
+        stats.polled = stats.delivered = 0
+
+        now = time.monotonic()
+        crashes = [t for t in self._crashes[shard] if now - t < self.restart_window] + [now]
+        self._crashes[shard] = crashes
+        print(f"[Supervisor] {shard} (pid {process.pid}) exited with {process.exitcode}")
+
+        if len(crashes) <= self.max_restarts or len(self.ring.nodes) == 1:
+            stats.restarts += 1
+            self._spawn(shard)
+        else:
+            self._rebalance_without(shard)
+
+    def _rebalance_without(self, shard: str) -> None:
+        print(f"[Supervisor] {shard} keeps crashing; reassigning its sensors")
+        self.ring.remove_node(shard)
+        self.assignment = self.ring.assign(self.sensor_ids)
+        for survivor, conn in self._conns.items():
+            try:
+                conn.send(("assign", self.assignment[survivor], self.shard_budget()))
+            except (BrokenPipeError, OSError):
+                pass  # its exit will be handled on the next poll
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """
+        Ask every worker to drain, then wait for them to exit.
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else self.settings.drain_timeout + 5)
+        for process in self._processes.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+        for shard, process in list(self._processes.items()):
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+            self._receive(shard)
+            self._conns[shard].close()
+        self._processes.clear()
+        self._conns.clear()
+
+    # -- reporting ---------------------------------------------------------
+
+    @property
+    def total_polled(self) -> int:
+        return sum(stats.total_polled for stats in self.stats.values())
+
+    @property
+    def total_delivered(self) -> int:
+        return sum(stats.total_delivered for stats in self.stats.values())
+
+    def export_metrics(self) -> None:
+        """
+        Publish per-shard totals as gauges in the supervisor's registry.
+        """
+        for shard in self.stats:
+            labels = {"shard": shard}
+            REGISTRY.gauge(
+                "citypulse_shard_readings_polled", "Readings polled per shard.", labels
+            ).set_function(lambda shard=shard: self.stats[shard].total_polled)
+            REGISTRY.gauge(
+                "citypulse_shard_restarts", "Worker restarts per shard.", labels
+            ).set_function(lambda shard=shard: self.stats[shard].restarts)
+
+
+def serve_sharded(
+    settings: PipelineSettings,
+    workers: int,
+    db_path: Optional[str] = None,
+    metrics_port: Optional[int] = 8000,
+    instance: str = "",
+    config_path: Optional[str] = None,
+) -> ShardSupervisor:
+    """
+    Blocking entry point for ``main.py serve --workers N``.
+
+    The supervisor serves ``/metrics`` from a background thread; workers
+    report their counters and stage histograms over pipes.
+    """
+    supervisor = ShardSupervisor(
+        settings, workers, db_path=db_path, forward_metrics=metrics_port is not None,
+        instance=instance, config_path=config_path,
+    )
+    supervisor.export_metrics()
+
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    if metrics_port is not None:
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(start_metrics_server(port=metrics_port))
+        threading.Thread(target=loop.run_forever, name="metrics", daemon=True).start()
+
+    print(f"[Supervisor] {workers} workers over {len(supervisor.sensor_ids)} sensors")
+    supervisor.run()
+    if loop is not None:
+        loop.call_soon_threadsafe(loop.stop)
+
+    print(
+        f"[Supervisor] Drained: {supervisor.total_polled} polled, "
+        f"{supervisor.total_delivered} delivered"
+    )
+    return supervisor
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+from typing import List
+
+from core.events import EmergencyResponseSystem
+from service.pipeline import AnalyzedBatch
+
+
+class AlertSink:
+    """
+    Publishes fire alerts for readings flagged by the analytics stage.
+    """
+
+    def __init__(self, emergency_system: EmergencyResponseSystem) -> None:
+        self._emergency_system = emergency_system
+
+    async def handle(self, batch: AnalyzedBatch) -> None:
+        for position in batch.alert_positions:
+            reading = batch.readings[position]
+            self._emergency_system.notify_all(
+                f" FIRE ALERT from {reading['sensor_id']}: "
+                f"{reading['temperature_celsius']:.2f} °C"
+            )
+
+    async def close(self) -> None:
+        return None
+
+
+class MemorySink:
+    """
+    Keeps batches in memory. Useful for tests and local runs.
+    """
+
+    def __init__(self) -> None:
+        self.batches: List[AnalyzedBatch] = []
+
+    @property
+    def reading_count(self) -> int:
+        return sum(len(batch.readings) for batch in self.batches)
+
+    async def handle(self, batch: AnalyzedBatch) -> None:
+        self.batches.append(batch)
+
+    async def close(self) -> None:
+        return None
+
+
+class SQLiteReadingSink:
+    """
+    Stores readings and their heatmap index in SQLite.
+
+    Writes run in a worker thread so the event loop never blocks on disk.
+    Rows are keyed on (sensor_id, timestamp) and written with
+    ``INSERT OR REPLACE``, so re-delivered batches are idempotent.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS readings ("
+        " sensor_id TEXT NOT NULL,"
+        " timestamp REAL NOT NULL,"
+        " temperature_celsius REAL,"
+        " humidity_percent REAL,"
+        " co2_ppm REAL,"
+        " heatmap_index REAL,"
+        " PRIMARY KEY (sensor_id, timestamp))"
+    )
+    INSERT = (
+        "INSERT OR REPLACE INTO readings "
+        "(sensor_id, timestamp, temperature_celsius, humidity_percent, co2_ppm, heatmap_index) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    )
+
+    def __init__(self, path: str) -> None:
+        # Generous timeout: sharded workers may share one database file
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(self.SCHEMA)
+            self._conn.commit()
+
+    def _write(self, batch: AnalyzedBatch) -> None:
+        rows = [
+            (
+                reading["sensor_id"],
+                reading["timestamp"],
+                reading["temperature_celsius"],
+                reading["humidity_percent"],
+                reading["co2_ppm"],
+                float(index),
+            )
+            for reading, index in zip(batch.readings, batch.heatmap_index)
+        ]
+        with self._lock:
+            self._conn.executemany(self.INSERT, rows)
+            self._conn.commit()
+
+    async def handle(self, batch: AnalyzedBatch) -> None:
+        await asyncio.to_thread(self._write, batch)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,45 @@
+"""
+Telemetry package for CityPulse IoT.
+
+Includes:
+- instrumentation.py: Hot-path stage timers, latency histograms, a runtime
+  sampling profiler and tracemalloc snapshot diffs
+
+Standard library only, so it can be imported from the ingestion hot path.
+"""
+
+from telemetry.instrumentation import (
+    LatencyHistogram,
+    MemoryTracker,
+    SamplingProfiler,
+    disable,
+    enable,
+    is_enabled,
+    stage_histogram,
+    stage_summary,
+    stage_timer,
+    timed,
+)
+from telemetry.metrics import (
+    REGISTRY,
+    MetricsRegistry,
+    install_gc_metrics,
+    start_metrics_server,
+)
+
+__all__ = [
+    "LatencyHistogram",
+    "MemoryTracker",
+    "MetricsRegistry",
+    "REGISTRY",
+    "SamplingProfiler",
+    "disable",
+    "enable",
+    "install_gc_metrics",
+    "is_enabled",
+    "stage_histogram",
+    "stage_summary",
+    "stage_timer",
+    "start_metrics_server",
+    "timed",
+]
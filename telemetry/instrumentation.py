@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Pipeline stages reported by default (ingest -> analytics -> alerting)
+PIPELINE_STAGES: Tuple[str, ...] = ("ingest", "analytics", "alerting")
+
+# Upper bounds in seconds, 1us .. 10s on a 1-2.5-5 ladder
+DEFAULT_BUCKETS: Tuple[float, ...] = tuple(
+    float(f"{base}e{exp}") for exp in range(-6, 1) for base in (1, 2.5, 5)
+) + (10.0,)
+
+# Plain module global: the disabled fast path is a single global load
+_enabled: bool = os.environ.get("CITYPULSE_INSTRUMENT", "") not in ("", "0")
+_histograms: Dict[str, "LatencyHistogram"] = {}
+_histograms_lock = threading.Lock()
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+
+    Recording takes no lock: in the asyncio loop there is a single writer,
+    and from threads the GIL makes a lost increment possible but harmless
+    for monitoring purposes.
+    """
+
+    __slots__ = ("name", "buckets", "counts", "count", "total")
+
+    def __init__(self, name: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        if not buckets or list(buckets) != sorted(buckets):
+            raise ValueError("buckets must be a non-empty ascending sequence")
+        self.name = name
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, pct: float) -> float:
+        """
+        Upper bound of the bucket holding the ``pct`` percentile
+        (``inf`` if it falls past the last bucket, 0.0 when empty).
+        """
+        if not 0 <= pct <= 100:
+            raise ValueError("pct must be within [0, 100]")
+        if self.count == 0:
+            return 0.0
+
+        target = self.count * pct / 100
+        running = 0
+        for index, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            if running >= target and bucket_count:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+def stage_histogram(stage: str) -> LatencyHistogram:
+    """
+    Shared histogram for a pipeline stage, created on first use.
+    """
+    histogram = _histograms.get(stage)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(stage, LatencyHistogram(stage))
+    return histogram
+
+
+def stage_summary() -> Dict[str, Dict[str, float]]:
+    return {stage: histogram.summary() for stage, histogram in sorted(_histograms.items())}
+
+
+class _StageTimer:
+    """
+    Reusable context manager that records elapsed time into a stage histogram.
+    Not re-entrant; use one per concurrent call site (or ``timed``).
+    """
+
+    __slots__ = ("histogram", "_start")
+
+    def __init__(self, histogram: LatencyHistogram) -> None:
+        self.histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self) -> "_StageTimer":
+        if _enabled:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if _enabled and self._start:
+            self.histogram.observe(time.perf_counter() - self._start)
+        self._start = 0.0
+
+
+def stage_timer(stage: str) -> _StageTimer:
+    """
+    Context manager timing a block into ``stage``:
+
+        with stage_timer("analytics"):
+            ...
+    """
+    return _StageTimer(stage_histogram(stage))
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """
+    Decorator recording each call's latency into ``stage``.
+
+    Works for plain and ``async`` functions. When instrumentation is
+    disabled the wrapper only checks a module global before calling through.
+    """
+    histogram = stage_histogram(stage)
+
+    def decorator(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not _enabled:
+                    return await fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler that can be switched on and off at runtime.
+
+    A daemon thread samples the target thread's stack every ``interval_seconds``
+    and counts collapsed stacks (flamegraph format).
+    """
+
+    def __init__(self, interval_seconds: float = 0.005, thread_id: Optional[int] = None) -> None:
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+        self.interval_seconds = interval_seconds
+        self.thread_id = thread_id
+        self.samples: Counter[str] = Counter()
+        self._samples_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        target = self.thread_id or threading.main_thread().ident
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(target,), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def reset(self) -> None:
+        with self._samples_lock:
+            self.samples = Counter()
+
+    def snapshot(self) -> Counter[str]:
+        """
+        A copy of the stack counts, safe to read while the sampler runs.
+        """
+        with self._samples_lock:
+            return Counter(self.samples)
+
+    def _run(self, target: Optional[int]) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            with self._samples_lock:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def top(self, n: int = 10) -> List[Tuple[str, int]]:
+        """
+        Functions most often at the top of the stack (self time).
+        """
+        leaves: Counter[str] = Counter()
+        for stack, count in self.snapshot().items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def collapsed(self) -> str:
+        """
+        Samples in collapsed-stack format for flamegraph tooling.
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.snapshot().most_common())
+
+
+class MemoryTracker:
+    """
+    On-demand tracemalloc snapshots; each ``diff()`` compares against the
+    previous snapshot so growth between two points in time is visible.
+    """
+
+    def __init__(self, frames: int = 1) -> None:
+        self.frames = frames
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._started_here = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_here = True
+        self._previous = self._snapshot()
+
+    def stop(self) -> None:
+        if self._started_here:
+            tracemalloc.stop()
+            self._started_here = False
+        self._previous = None
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+
+    def diff(self, top: int = 10, key_type: str = "lineno") -> List[tracemalloc.StatisticDiff]:
+        """
+        Largest allocation changes since the last call (or ``start()``).
+        """
+        if self._previous is None:
+            raise RuntimeError("MemoryTracker.start() must be called first")
+
+        current = self._snapshot()
+        stats = current.compare_to(self._previous, key_type)
+        self._previous = current
+        return stats[:top]
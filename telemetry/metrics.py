@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+from telemetry.instrumentation import (
+    DEFAULT_BUCKETS,
+    PIPELINE_STAGES,
+    LatencyHistogram,
+    enable,
+    stage_histogram,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_key(labels: Optional[Mapping[str, str]]) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """
+    Monotonically increasing value. ``inc`` is a plain attribute update (no lock).
+    """
+
+    kind = "counter"
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        self.value += amount
+
+    def samples(self, name: str, key: LabelKey) -> Iterator[str]:
+        yield f"{name}{_format_labels(key)} {_format_value(self.value)}"
+
+
+class Gauge:
+    """
+    Value that can go up and down, or be computed at scrape time via ``set_function``.
+    """
+
+    kind = "gauge"
+    __slots__ = ("value", "_function")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def read(self) -> float:
+        return float(self._function()) if self._function is not None else self.value
+
+    def samples(self, name: str, key: LabelKey) -> Iterator[str]:
+        yield f"{name}{_format_labels(key)} {_format_value(self.read())}"
+
+
+class Histogram:
+    """
+    Prometheus histogram backed by a ``LatencyHistogram``, so stage timers
+    from ``telemetry.instrumentation`` can be exported without copying.
+    """
+
+    kind = "histogram"
+    __slots__ = ("histogram",)
+
+    def __init__(self, histogram: Optional[LatencyHistogram] = None, name: str = "") -> None:
+        self.histogram = histogram if histogram is not None else LatencyHistogram(name, DEFAULT_BUCKETS)
+
+    def observe(self, value: float) -> None:
+        self.histogram.observe(value)
+
+    def samples(self, name: str, key: LabelKey) -> Iterator[str]:
+        histogram = self.histogram
+        counts = list(histogram.counts)
+        running = 0
+        for bound, count in zip(histogram.buckets, counts):
+            running += count
+            yield f"{name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {running}"
+        running += counts[-1]
+        yield f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {running}"
+        yield f"{name}_sum{_format_labels(key)} {_format_value(histogram.total)}"
+        yield f"{name}_count{_format_labels(key)} {running}"
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    """
+    In-process metric registry rendered in the Prometheus text format.
+
+    Registration takes a lock; recording on the returned metric objects
+    does not. Asking for an existing (name, labels) pair returns the same
+    object, so modules can declare their metrics at import time.
+    """
+
+    def __init__(self) -> None:
+        self._families: Dict[str, Tuple[str, str, Dict[LabelKey, Metric]]] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(
+        self,
+        kind: str,
+        name: str,
+        help_text: str,
+        labels: Optional[Mapping[str, str]],
+        factory: Callable[[], Metric],
+    ) -> Metric:
+        key = _label_key(labels)
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = (kind, help_text, {})
+                self._families[name] = family
+            elif family[0] != kind:
+                raise ValueError(f"Metric {name} already registered as a {family[0]}")
+
+            children = family[2]
+            metric = children.get(key)
+            if metric is None:
+                metric = factory()
+                children[key] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Optional[Mapping[str, str]] = None) -> Counter:
+        return self._get_or_create("counter", name, help_text, labels, Counter)  # type: ignore[return-value]
+
+    def gauge(self, name: str, help_text: str, labels: Optional[Mapping[str, str]] = None) -> Gauge:
+        return self._get_or_create("gauge", name, help_text, labels, Gauge)  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Optional[Mapping[str, str]] = None,
+        histogram: Optional[LatencyHistogram] = None,
+    ) -> Histogram:
+        return self._get_or_create(  # type: ignore[return-value]
+            "histogram", name, help_text, labels, lambda: Histogram(histogram, name)
+        )
+
+    def export_values(self) -> List[Tuple[str, str, str, LabelKey, Tuple[float, ...]]]:
+        """
+        Counter values and histogram bucket counts (followed by the sum) as
+        ``(name, kind, help, labels, values)``, for forwarding to another
+        process's registry with ``apply_deltas``. Gauges describe the local
+        process and are left out.
+        """
+        with self._lock:
+            families = [
+                (name, kind, help_text, list(children.items()))
+                for name, (kind, help_text, children) in self._families.items()
+            ]
+
+        values: List[Tuple[str, str, str, LabelKey, Tuple[float, ...]]] = []
+        for name, kind, help_text, children in families:
+            for key, metric in children:
+                if isinstance(metric, Counter):
+                    values.append((name, kind, help_text, key, (metric.value,)))
+                elif isinstance(metric, Histogram):
+                    histogram = metric.histogram
+                    values.append(
+                        (name, kind, help_text, key, (*histogram.counts, histogram.total))
+                    )
+        return values
+
+    def apply_deltas(self, deltas: List[Tuple[str, str, str, LabelKey, Tuple[float, ...]]]) -> None:
+        """
+        Add increments shaped like ``export_values()`` output to this
+        registry's counters and histograms, creating missing ones.
+        Histograms with a different bucket layout are skipped.
+        """
+        for name, kind, help_text, key, values in deltas:
+            labels = dict(key)
+            if kind == "counter":
+                if values[0] > 0:
+                    self.counter(name, help_text, labels).inc(values[0])
+            elif kind == "histogram":
+                histogram = self.histogram(name, help_text, labels).histogram
+                counts = values[:-1]
+                if len(counts) != len(histogram.counts):
+                    continue
+                for index, count in enumerate(counts):
+                    histogram.counts[index] += int(count)
+                histogram.count += int(sum(counts))
+                histogram.total += values[-1]
+
+    def render(self) -> str:
+        """
+        Current values in Prometheus text exposition format.
+        """
+        with self._lock:
+            families = [
+                (name, kind, help_text, list(children.items()))
+                for name, (kind, help_text, children) in sorted(self._families.items())
+            ]
+
+        lines: List[str] = []
+        for name, kind, help_text, children in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in children:
+                lines.extend(metric.samples(name, key))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Export the shared stage timers (poll latency = ingest, alert dispatch = alerting)
+for _stage in PIPELINE_STAGES:
+    REGISTRY.histogram(
+        "citypulse_stage_latency_seconds",
+        "Latency of each pipeline stage call.",
+        {"stage": _stage},
+        histogram=stage_histogram(_stage),
+    )
+
+
+_gc_installed = False
+
+
+def install_gc_metrics(registry: MetricsRegistry = REGISTRY) -> None:
+    """
+    Record garbage-collector pause durations via ``gc.callbacks``.
+    """
+    global _gc_installed
+    if _gc_installed:
+        return
+
+    pauses = {
+        generation: registry.histogram(
+            "citypulse_gc_pause_seconds",
+            "Garbage collector pause duration.",
+            {"generation": str(generation)},
+        )
+        for generation in range(3)
+    }
+    started = [0.0]
+
+    def _callback(phase: str, info: Dict[str, int]) -> None:
+        if phase == "start":
+            started[0] = time.perf_counter()
+        elif started[0]:
+            pauses[info["generation"]].observe(time.perf_counter() - started[0])
+            started[0] = 0.0
+
+    gc.callbacks.append(_callback)
+    _gc_installed = True
+
+
+async def _handle_request(
+    registry: MetricsRegistry,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+        while True:
+            header = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            if header in (b"\r\n", b"\n", b""):
+                break
+
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, content_type, body = "200 OK", CONTENT_TYPE, registry.render().encode()
+        elif len(parts) >= 2 and parts[0] == "GET" and parts[1] == "/healthz":
+            status, content_type, body = "200 OK", "text/plain", b"ok\n"
+        else:
+            status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    registry: MetricsRegistry = REGISTRY,
+) -> asyncio.AbstractServer:
+    """
+    Serve ``/metrics`` (Prometheus text) and ``/healthz`` on the running loop.
+
+    Stage timers are switched on, since their histograms are exported, and
+    GC pause tracking is installed.
+
+    Returns:
+        asyncio.AbstractServer: Close it to stop serving.
+    """
+    enable()
+    install_gc_metrics(registry)
+    return await asyncio.start_server(
+        lambda reader, writer: _handle_request(registry, reader, writer), host, port
+    )
@@ -4,16 +4,56 @@ import asyncio
 import sqlite3
 import time
 import unittest
+from unittest import mock
 import gc
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
 
 import numpy as np
 
+from core.catalog import DeviceCatalog
 from core.meta import SensorMeta
 from analytics.strategies import WiFiStrategy, LoRaWanStrategy
+from ingestion.dedup import Deduplicator
+from ingestion.scheduler import AdaptivePollScheduler
 from ingestion.stream import poll_sector
 from analytics.memory_manager import SensorCache, force_cleanup
 from security.sanitizer import get_sensor_by_id
-from analytics.processor import calculate_heatmap_index
+from ingestion.gateway import (
+    BINARY_MAGIC,
+    DeviceRateLimiter,
+    ReadingBatch,
+    ReadingGateway,
+    encode_records,
+)
+from analytics.backends import get_backend
+from analytics.processor import calculate_heatmap_index, grouped_mean, resample_per_minute
+from analytics.sketches import GroupSketches, HyperLogLog, KLLSketch
+from benchmarks.harness import compare, measure, percentile
+from config import ConfigFileWatcher, GridConfig, install_sighup_reload
+from core.events import EmergencyResponseSystem
+from core.interfaces import AbstractSensor
+from telemetry import instrumentation
+from telemetry.metrics import REGISTRY, MetricsRegistry, start_metrics_server
+from sensors.implementations import FireSensor, TrafficSensor
+from service import pipeline as pipeline_module
+from service.pipeline import analyze_batch
+from service.server import start_config_reload
+from service.replay import analyse_chunk
+from service import (
+    ConsistentHashRing,
+    IngestionPipeline,
+    MemorySink,
+    PipelineSettings,
+    ReplayEngine,
+    SQLiteReadingSink,
+    ShardSupervisor,
+    StateSnapshotter,
+)
 
 
 class TestCityPulse(unittest.TestCase):
@@ -128,6 +168,696 @@ class TestCityPulse(unittest.TestCase):
         # NumPy should be MUCH faster
         self.assertGreater(loop_time / numpy_time, 30, "NumPy is not significantly faster than loop")
 
+    # Test Case 7: Config Hot Reload
+    def test_config_hot_reload(self) -> None:
+        config = GridConfig()
+        self.addCleanup(config.reset)
+
+        sensor = FireSensor("FIRE-T7", EmergencyResponseSystem(), zone="north")
+        before = config.snapshot
+        seen = []
+        callback = lambda old, new: seen.append(new.changed_keys(old))
+        config.subscribe(callback, keys=["zone_fire_thresholds"])
+        self.addCleanup(config.unsubscribe, callback)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "grid.json")
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump({"zone_fire_thresholds": {"north": 55.0}}, handle)
+
+            watcher = ConfigFileWatcher(path)
+            self.assertTrue(watcher.poll())
+            self.assertFalse(watcher.poll())
+
+            # Old snapshot is untouched; sensor picked up its zone threshold
+            self.assertEqual(before.fire_threshold_for("north"), 80.0)
+            self.assertEqual(sensor._threshold, 55.0)
+            self.assertEqual(seen, [frozenset({"zone_fire_thresholds"})])
+
+            if hasattr(signal, "SIGHUP"):
+                # SIGHUP while the main thread holds the write lock must not
+                # deadlock: the reload runs on the watcher thread afterwards.
+                self.addCleanup(signal.signal, signal.SIGHUP, signal.getsignal(signal.SIGHUP))
+                watcher = ConfigFileWatcher(path, interval_seconds=60.0)
+                self.assertTrue(install_sighup_reload(path, watcher))
+                watcher.start()
+                self.addCleanup(watcher.stop)
+                with open(path, "w", encoding="utf-8") as handle:
+                    json.dump({"zone_fire_thresholds": {"north": 60.0}}, handle)
+                with config._write_lock:
+                    os.kill(os.getpid(), signal.SIGHUP)
+                deadline = time.monotonic() + 5.0
+                while sensor._threshold != 60.0 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                self.assertEqual(sensor._threshold, 60.0)
+                seen.pop()
+
+        config.set("api_endpoint", "https://example.invalid")
+        self.assertEqual(len(seen), 1)
+
+        # Notifications arrive in publish order, even when a subscriber writes,
+        # and a failing subscriber does not stop the rest
+        def broken(old, new):
+            raise RuntimeError("subscriber bug")
+
+        def cascade(old, new):
+            if new.get("fire_threshold_celsius") == 90.0:
+                config.set("fire_threshold_celsius", 95.0)
+
+        order = []
+        record = lambda old, new: order.append(new.get("fire_threshold_celsius"))  # noqa: E731
+        for listener in (broken, cascade, record):
+            config.subscribe(listener, keys=["fire_threshold_celsius"])
+            self.addCleanup(config.unsubscribe, listener)
+        config.set("fire_threshold_celsius", 90.0)
+        self.assertEqual(order, [90.0, 95.0])
+        self.assertEqual(config.get("fire_threshold_celsius"), 95.0)
+
+        # The service loads --config, and alerts follow each sensor's zone threshold
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "grid.json")
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump({"fire_threshold_celsius": 70.0, "zone_fire_thresholds": {"north": 40.0}}, handle)
+            watcher = start_config_reload(path)
+            self.addCleanup(watcher.stop)
+            self.assertEqual(config.get("fire_threshold_celsius"), 70.0)
+
+            pipeline = IngestionPipeline(
+                PipelineSettings(sensor_count=2), [MemorySink()], sensor_zones={"SENSOR-1": "north"}
+            )
+            readings = [
+                {"sensor_id": sensor_id, "temperature_celsius": 50.0,
+                 "humidity_percent": 40.0, "co2_ppm": 400.0}
+                for sensor_id in ("SENSOR-1", "SENSOR-2")
+            ]
+            self.assertEqual(analyze_batch(readings, pipeline.catalog.zone_of).alert_positions, [0])
+            self.assertEqual(analyze_batch(readings).alert_positions, [])
+
+    # Test Case 8: Lazy Package Imports
+    def test_lazy_package_imports(self) -> None:
+        code = (
+            "import sys, analytics, security, sensors, ingestion\n"
+            "heavy = [m for m in ('numpy', 'pandas', 'cryptography') if m in sys.modules]\n"
+            "assert not heavy, heavy\n"
+            "assert 'EnvironmentSensor' in dir(sensors) and 'DeviceFactory' in dir(sensors)\n"
+            "assert not hasattr(security, 'no_such_helper')\n"
+            "assert callable(analytics.calculate_heatmap_index)\n"
+            "assert 'numpy' in sys.modules\n"
+            "assert 'calculate_heatmap_index' in vars(analytics)\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        completed = subprocess.run(
+            [sys.executable, "-c", code], cwd=root, capture_output=True, text=True
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+
+    # Test Case 9: Benchmark Regression Check
+    def test_benchmark_regression_check(self) -> None:
+        self.assertAlmostEqual(percentile([1.0, 2.0, 3.0, 4.0], 50), 2.5)
+        self.assertEqual(percentile([5.0], 99), 5.0)
+
+        result = measure("noop", lambda: None, warmup=1, repeats=5, min_sample_seconds=0.001)
+        self.assertEqual(len(result.samples), 5)
+        self.assertLessEqual(result.p50, result.p99)
+
+        fast = {"noop": {"p50": result.p50 * 10}}
+        slow = {"noop": {"p50": result.p50 / 10}}
+        self.assertEqual(compare([result], fast, threshold=0.2), [])
+        self.assertEqual([r.name for r in compare([result], slow, threshold=0.2)], ["noop"])
+
+    # Test Case 10: Stage Instrumentation
+    def test_stage_instrumentation(self) -> None:
+        histogram = instrumentation.stage_histogram("test-stage")
+        histogram.reset()
+
+        @instrumentation.timed("test-stage")
+        def work() -> int:
+            return 42
+
+        @instrumentation.timed("test-stage")
+        async def async_work() -> int:
+            return 7
+
+        instrumentation.disable()
+        self.assertEqual(work(), 42)
+        self.assertEqual(histogram.count, 0)
+
+        instrumentation.enable()
+        self.addCleanup(instrumentation.disable)
+        work()
+        self.assertEqual(asyncio.run(async_work()), 7)
+        with instrumentation.stage_timer("test-stage"):
+            pass
+        self.assertEqual(histogram.count, 3)
+        self.assertGreater(histogram.percentile(99), 0.0)
+
+        tracker = instrumentation.MemoryTracker()
+        tracker.start()
+        self.addCleanup(tracker.stop)
+        blob = [bytearray(1024) for _ in range(100)]
+        self.assertTrue(tracker.diff(top=5))
+        del blob
+
+        # Reports can be read while the sampler thread is still adding stacks
+        profiler = instrumentation.SamplingProfiler(interval_seconds=0.0005)
+        profiler.start()
+        self.addCleanup(profiler.stop)
+        deadline = time.time() + 0.2
+        while time.time() < deadline:
+            profiler.top(5)
+            profiler.collapsed()
+        profiler.stop()
+        self.assertTrue(profiler.top(5))
+        self.assertEqual(sum(profiler.snapshot().values()),
+                         sum(int(line.rsplit(" ", 1)[1]) for line in profiler.collapsed().splitlines()))
+
+    # Test Case 11: Prometheus Metrics Endpoint
+    def test_metrics_endpoint(self) -> None:
+        registry = MetricsRegistry()
+        readings = registry.counter("test_readings_total", "Readings.")
+        depth = registry.gauge("test_queue_depth", "Depth.", {"stage": "ingest"})
+        latency = registry.histogram("test_latency_seconds", "Latency.")
+
+        readings.inc(3)
+        self.assertIs(registry.counter("test_readings_total", "Readings."), readings)
+        depth.set(7)
+        latency.observe(0.002)
+
+        async def scrape() -> bytes:
+            server = await start_metrics_server("127.0.0.1", 0, registry)
+            self.addCleanup(instrumentation.disable)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n")
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+                return response
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        response = asyncio.run(scrape()).decode()
+        self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+        self.assertIn("# TYPE test_readings_total counter", response)
+        self.assertIn("test_readings_total 3", response)
+        self.assertIn('test_queue_depth{stage="ingest"} 7', response)
+        self.assertIn('test_latency_seconds_bucket{le="0.0025"} 1', response)
+        self.assertIn("test_latency_seconds_count 1", response)
+
+    # Test Case 12: Pipeline Graceful Drain
+    def test_pipeline_graceful_drain(self) -> None:
+        settings = PipelineSettings(
+            sensor_count=40, sector_size=10, poll_interval=0.0, poll_delay=0.0,
+            queue_size=2, analytics_workers=1, sink_workers=1,
+        )
+        sink = MemorySink()
+        pipeline = IngestionPipeline(settings, [sink])
+
+        async def run_briefly() -> None:
+            task = asyncio.create_task(pipeline.run())
+            await asyncio.sleep(0.2)
+            pipeline.request_stop()
+            await task
+
+        asyncio.run(run_briefly())
+
+        self.assertGreater(pipeline.polled, 0)
+        self.assertEqual(pipeline.polled, pipeline.delivered)
+        self.assertEqual(sink.reading_count, pipeline.polled)
+        self.assertEqual(len(sink.batches[0].heatmap_index), 10)
+
+        # One sector failing is counted and skipped; the rest keep flowing and drain
+        real_poll = pipeline_module.poll_sector
+
+        async def flaky_poll(sensor_ids, delay_seconds=0.1):
+            if "SENSOR-1" in sensor_ids:
+                raise ConnectionError("sector offline")
+            return await real_poll(sensor_ids, delay_seconds=delay_seconds)
+
+        sink = MemorySink()
+        pipeline = IngestionPipeline(settings, [sink])
+        with mock.patch.object(pipeline_module, "poll_sector", flaky_poll):
+            asyncio.run(run_briefly())
+        self.assertGreater(pipeline.poll_errors, 0)
+        self.assertGreater(pipeline.polled, 0)
+        self.assertEqual(pipeline.polled, pipeline.delivered)
+        self.assertEqual(pipeline.catalog.query(health="unhealthy").tolist()[:1], ["SENSOR-1"])
+
+        # A batch that fails analysis is dropped without stopping its worker
+        sink = MemorySink()
+        pipeline = IngestionPipeline(settings, [sink])
+        real_analyze = pipeline_module.analyze_batch
+        calls = []
+
+        def flaky_analyze(readings, *args):
+            calls.append(len(readings))
+            if len(calls) == 1:
+                raise ValueError("bad batch")
+            return real_analyze(readings, *args)
+
+        with mock.patch.object(pipeline_module, "analyze_batch", flaky_analyze):
+            asyncio.run(run_briefly())
+        self.assertEqual(pipeline.delivered, pipeline.polled - calls[0])
+        self.assertEqual(sink.reading_count, pipeline.delivered)
+
+    # Test Case 13: Consistent-Hash Sharding
+    def test_consistent_hash_sharding(self) -> None:
+        sensor_ids = [f"SENSOR-{i}" for i in range(2000)]
+        ring = ConsistentHashRing(["shard-0", "shard-1", "shard-2", "shard-3"])
+        before = {key: ring.node_for(key) for key in sensor_ids}
+
+        sizes = [len(keys) for keys in ring.assign(sensor_ids).values()]
+        self.assertGreater(min(sizes), 250)  # roughly balanced
+
+        ring.remove_node("shard-2")
+        moved = [key for key in sensor_ids if ring.node_for(key) != before[key]]
+        self.assertTrue(all(before[key] == "shard-2" for key in moved))
+
+        # The pod's poll budget is split across its shards, and re-split on removal
+        supervisor = ShardSupervisor(PipelineSettings(sensor_count=100, poll_budget=12.0), workers=4)
+        self.assertEqual(supervisor.shard_budget() * len(supervisor.ring.nodes), 12.0)
+        supervisor._rebalance_without("shard-3")
+        self.assertAlmostEqual(supervisor.shard_budget() * len(supervisor.ring.nodes), 12.0)
+        self.assertEqual(supervisor.shard_budget(), 4.0)
+        scheduler = AdaptivePollScheduler(max_polls_per_second=6.0)  # lowered: burst shrinks too
+        scheduler.set_budget(supervisor.shard_budget())
+        for i in range(20):
+            scheduler.add(f"S-{i}")
+        self.assertEqual(len(scheduler.pop_due(0.0)), 4)
+
+    def test_shard_supervisor_restarts_worker(self) -> None:
+        settings = PipelineSettings(sensor_count=60, sector_size=10, poll_interval=0.05,
+                                    poll_delay=0.0, drain_timeout=5.0)
+        supervisor = ShardSupervisor(settings, workers=2, report_interval=0.05, forward_metrics=True)
+        ingested = REGISTRY.counter("citypulse_readings_ingested_total", "")
+        ingested_before = ingested.value
+        supervisor.start()
+        self.addCleanup(supervisor.shutdown, 5.0)
+
+        def pump(seconds: float) -> None:
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                supervisor.poll(timeout=0.05)
+
+        pump(1.0)
+        os.kill(supervisor.stats["shard-0"].pid, signal.SIGKILL)
+        pump(1.5)
+        supervisor.shutdown(5.0)
+
+        self.assertEqual(supervisor.stats["shard-0"].restarts, 1)
+        self.assertGreater(supervisor.stats["shard-1"].total_delivered, 0)
+        self.assertGreater(supervisor.total_polled, 0)
+        # Workers' counters reach the supervisor's /metrics
+        self.assertEqual(ingested.value - ingested_before, supervisor.total_polled)
+
+    # Test Case 14: Network Ingestion Gateway
+    def test_network_gateway(self) -> None:
+        payload = encode_records([("DEV-1", 1, 10.0, 95.0, 40.0, 800.0),
+                                  ("DEV-2", 1, 10.0, 30.0, 40.0, 800.0)])
+        batch = ReadingBatch.from_buffer(payload)
+        self.assertFalse(batch.records.flags.owndata)  # view over the datagram
+        self.assertEqual(batch[0]["sensor_id"], "DEV-1")
+        self.assertEqual(list(batch.column("temperature_celsius")), [95.0, 30.0])
+
+        limiter = DeviceRateLimiter(rate=1.0, burst=1.0)
+        repeated = ReadingBatch.from_buffer(encode_records([("DEV-9", i, 0.0, 1.0, 1.0, 1.0)
+                                                            for i in range(5)]))
+        self.assertEqual(len(limiter.filter(repeated)), 1)
+        bounded = DeviceRateLimiter(rate=1.0, burst=1.0, max_devices=100)
+        spoofed = encode_records([(f"SPOOF-{i}", 1, 0.0, 1.0, 1.0, 1.0) for i in range(1000)])
+        bounded.filter(ReadingBatch.from_buffer(spoofed))
+        self.assertEqual(len(bounded), 100)
+
+        sink = MemorySink()
+        pipeline = IngestionPipeline(
+            PipelineSettings(sensor_count=0, poll_interval=0.01), [sink]
+        )
+        ingested = REGISTRY.counter("citypulse_readings_ingested_total", "")
+        ingested_before = ingested.value
+
+        async def push() -> None:
+            task = asyncio.create_task(pipeline.run())
+            await asyncio.sleep(0)
+            gateway = ReadingGateway(pipeline.submit, pipeline.try_submit)
+            _, port = await gateway.start_tcp("127.0.0.1", 0)
+
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(BINARY_MAGIC + payload)
+            await writer.drain()
+            writer.close()
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"DEV-3,7,10.0,20.0,30.0,400.0\nbroken line\n")
+            await writer.drain()
+            writer.close()
+            # Magic split across segments is still recognised as binary
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(BINARY_MAGIC[:2])
+            await writer.drain()
+            await asyncio.sleep(0.05)
+            writer.write(BINARY_MAGIC[2:] + encode_records([("DEV-4", 1, 10.0, 20.0, 30.0, 400.0)]))
+            await writer.drain()
+            writer.close()
+
+            # A device that keeps its connection open is cut off by close()
+            reader, open_writer = await asyncio.open_connection("127.0.0.1", port)
+            open_writer.write(BINARY_MAGIC + encode_records([("DEV-5", 1, 10.0, 20.0, 30.0, 400.0)]))
+            await open_writer.drain()
+
+            await asyncio.sleep(0.2)
+            await gateway.close()
+            self.assertEqual(await reader.read(), b"")
+            pipeline.request_stop()
+            self.assertFalse(await pipeline.submit(ReadingBatch.from_buffer(payload)))
+            self.assertFalse(pipeline.try_submit(ReadingBatch.from_buffer(payload)))
+            await task
+            open_writer.close()
+
+        asyncio.run(push())
+
+        self.assertEqual(sink.reading_count, 5)
+        self.assertEqual(pipeline.polled, pipeline.delivered)
+        self.assertEqual(ingested.value - ingested_before, 5)  # feeds the HPA ingest-rate metric
+        alerts = [batch.readings[i]["sensor_id"] for batch in sink.batches
+                  for i in batch.alert_positions]
+        self.assertEqual(alerts, ["DEV-1"])
+
+    # Test Case 15: Adaptive Poll Scheduling
+    def test_adaptive_poll_scheduler(self) -> None:
+        scheduler = AdaptivePollScheduler(max_polls_per_second=2.0)
+        scheduler.add("QUIET", "TrafficSensor")
+        scheduler.add("NOISY", "TrafficSensor")
+        scheduler.add("FIRE", "FireSensor")
+
+        # Budget: two polls available at t=0, the third waits for a token
+        first = scheduler.pop_due(0.0)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(scheduler.deferred, 1)
+        second = scheduler.pop_due(0.5)
+        self.assertEqual(sorted(first + second), ["FIRE", "NOISY", "QUIET"])
+
+        for step, value in enumerate([20.0, 80.0, 10.0, 90.0]):
+            scheduler.complete("NOISY", float(step), value)
+            scheduler.complete("QUIET", float(step), 20.0)
+        scheduler.complete("FIRE", 0.0, 95.0, alerting=True)
+
+        self.assertLess(scheduler.interval("NOISY"), scheduler.interval("QUIET"))
+        self.assertEqual(scheduler.interval("QUIET"), TrafficSensor.POLL_INTERVAL_SECONDS)
+        self.assertEqual(scheduler.interval("FIRE"), FireSensor.MIN_POLL_INTERVAL_SECONDS)
+        self.assertEqual(scheduler.next_due(), FireSensor.MIN_POLL_INTERVAL_SECONDS)
+
+    # Test Case 16: Deduplication and Reordering
+    def test_dedup_and_reorder(self) -> None:
+        def reading(sensor_id: str, sequence: int) -> dict:
+            return {"sensor_id": sensor_id, "sequence": sequence, "timestamp": 0.0}
+
+        dedup = Deduplicator(window=8, jitter_seconds=1.0, max_buffered=5)
+        arrivals = [reading("A", seq) for seq in (3, 1, 2, 1, 5, 4, 3)] + [reading("B", 1)]
+        self.assertEqual(dedup.push(arrivals, now=0.0), [])
+        self.assertEqual(dedup.duplicates, 2)
+        self.assertEqual(dedup.buffered, 6)
+
+        # Not yet due; then released in sequence order per sensor
+        self.assertEqual(dedup.release(now=0.5), [])
+        released = dedup.release(now=1.0)
+        self.assertEqual([r["sequence"] for r in released if r["sensor_id"] == "A"], [1, 2, 3, 4, 5])
+
+        # A replay of a released reading is a duplicate; below the window is late
+        dedup.push([reading("A", 2), reading("A", 20), reading("A", 6)], now=2.0)
+        self.assertEqual((dedup.duplicates, dedup.late), (3, 1))
+
+        # A full buffer releases its lowest sequence early
+        ready = dedup.push([reading("C", seq) for seq in (9, 8, 7, 6, 5, 4)], now=3.0)
+        self.assertEqual([r["sequence"] for r in ready], [4])
+        self.assertEqual(dedup.forced, 1)
+
+        # Without a jitter delay, a unique out-of-order reading inside the window is kept
+        passthrough = Deduplicator(window=8)
+        ready = passthrough.push([reading("E", seq) for seq in (5, 3, 5, 1)], now=0.0)
+        self.assertEqual([r["sequence"] for r in ready], [5, 3, 1])
+        self.assertEqual((passthrough.duplicates, passthrough.late), (1, 0))
+
+        # Spoofed sensor IDs cannot grow the window table past max_sensors
+        bounded = Deduplicator(window=8, max_sensors=100)
+        bounded.push([reading(f"SPOOF-{i}", 1) for i in range(1000)], now=0.0)
+        self.assertEqual((len(bounded._tracks), bounded.evicted), (100, 900))
+
+        # Gateway batches are filtered on their columns and stay columnar
+        columnar = Deduplicator(window=8)
+        batch = ReadingBatch.from_buffer(encode_records(
+            [("D", 1, 0.0, 1.0, 1.0, 1.0), ("D", 2, 0.0, 1.0, 1.0, 1.0), ("D", 1, 0.0, 1.0, 1.0, 1.0)]
+        ))
+        kept = columnar.push(batch, now=0.0)
+        self.assertIsInstance(kept, ReadingBatch)
+        self.assertEqual(kept.column("sequence").tolist(), [1, 2])
+        clean = ReadingBatch.from_buffer(encode_records([("D", 3, 0.0, 1.0, 1.0, 1.0)]))
+        self.assertIs(columnar.push(clean, now=0.0), clean)  # nothing dropped: no copy
+
+    # Test Case 17: Historical Replay
+    def test_replay_engine(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "readings.db")
+            conn = sqlite3.connect(path)
+            conn.execute(SQLiteReadingSink.SCHEMA)
+            rows = [
+                (f"S-{i % 5}", 1000.0 + i, 20.0 + i % 90, 50.0, 400.0, -1.0)
+                for i in range(500)
+            ]
+            conn.executemany(SQLiteReadingSink.INSERT, rows)
+            conn.commit()
+            conn.close()
+
+            engine = ReplayEngine(path, workers=2, chunk_seconds=60.0, fire_threshold=80.0)
+            self.assertEqual(len(engine.chunks()), 9)
+            stats = engine.run()
+            self.assertEqual(stats.readings, 500)
+            self.assertEqual(stats.alerts, sum(1 for row in rows if row[2] > 80.0))
+
+            # Idempotent: a second pass rewrites the same rows
+            engine.run(start=1100.0, end=1200.0)
+            conn = sqlite3.connect(path)
+            count, stale = conn.execute(
+                "SELECT COUNT(*), SUM(heatmap_index = -1.0) FROM readings"
+            ).fetchone()
+            (index,) = conn.execute(
+                "SELECT heatmap_index FROM readings WHERE sensor_id = 'S-0' AND timestamp = 1000.0"
+            ).fetchone()
+            conn.close()
+            self.assertEqual((count, stale), (500, 0))
+            self.assertAlmostEqual(index, 0.5 * 20.0 + 0.3 * 50.0 + 0.2 * np.log(400.0))
+
+            # A separate target gets full rows; in place only row IDs travel back
+            target = os.path.join(tmp, "replay.db")
+            copy = ReplayEngine(path, target=target, workers=1, chunk_seconds=60.0)
+            self.assertEqual(copy.run().readings, 500)
+            conn = sqlite3.connect(target)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM readings").fetchone(), (500,))
+            conn.close()
+            output = analyse_chunk(path, 1000.0, 1060.0, 80.0)
+            self.assertEqual((len(output.rowids), output.rows), (60, None))
+
+    # Test Case 18: NumPy Aggregation Engine
+    def test_numpy_aggregation_engine(self) -> None:
+        import pandas as pd
+
+        rng = np.random.default_rng(7)
+        index = pd.date_range("2024-01-01 00:00:30", periods=600, freq="1500ms", tz="Europe/Paris")
+        df = pd.DataFrame(
+            {
+                "temperature": rng.uniform(10, 50, 600),
+                "humidity": rng.uniform(10, 90, 600),
+                "co2": rng.integers(300, 2000, 600),
+            },
+            index=index,
+        )
+        df.iloc[5:50, 1] = np.nan
+        df = df.drop(df.index[100:200])  # leaves empty minutes
+        pd.testing.assert_frame_equal(resample_per_minute(df), df.resample("1min").mean())
+
+        # Readings stamped NaT are skipped, as pandas does
+        with_nat = df.set_axis(df.index.insert(3, pd.NaT)[:-1])
+        pd.testing.assert_frame_equal(
+            resample_per_minute(with_nat), with_nat.resample("1min").mean(), check_freq=False
+        )
+
+        # Indexes counting s, ms or us (pandas 2) are not mistaken for nanoseconds
+        for unit in ("s", "ms", "us"):
+            coarse = df.set_axis(df.index.as_unit(unit))
+            pd.testing.assert_frame_equal(resample_per_minute(coarse), coarse.resample("1min").mean())
+
+        # Sorted, compact unsorted and sparse keys all agree with pandas
+        values = {"v": rng.normal(size=1000)}
+        for keys in (np.sort(rng.integers(0, 50, 1000)), rng.integers(0, 50, 1000),
+                     rng.integers(0, 10**12, 1000)):
+            groups, means = grouped_mean(keys, values)
+            expected_groups, expected = get_backend("pandas").grouped_mean(keys, values)
+            np.testing.assert_array_equal(groups, expected_groups)
+            np.testing.assert_allclose(means["v"], expected["v"])
+
+        with self.assertRaises(ValueError):
+            get_backend("duckdb")
+
+    # Test Case 19: Mergeable Sketches
+    def test_mergeable_sketches(self) -> None:
+        rng = np.random.default_rng(11)
+        values = rng.lognormal(3, 1, 200_000)
+        qs = np.array([0.5, 0.95, 0.99])
+
+        # Two shards merged: still within the configured rank error
+        left, right = KLLSketch.for_error(0.01, seed=1), KLLSketch.for_error(0.01, seed=2)
+        for chunk in np.array_split(values[:100_000], 10):
+            left.update(chunk)
+        right.update(values[100_000:])
+        merged = left.merge(right)
+        self.assertEqual(merged.count, len(values))
+        ranks = np.searchsorted(np.sort(values), merged.quantiles(qs)) / len(values)
+        self.assertLess(np.abs(ranks - qs).max(), merged.rank_error)
+        self.assertLess(merged.retained, 4 * merged.k)
+
+        # Overlapping ID ranges; str and bytes IDs hash alike
+        first, second = HyperLogLog(12), HyperLogLog(12)
+        first.update([f"SENSOR-{i}" for i in range(30_000)])
+        second.update(np.array([b"SENSOR-%d" % i for i in range(20_000, 50_000)], dtype="S16"))
+        estimate = first.merge(second).count()
+        self.assertLess(abs(estimate / 50_000 - 1), 3 * first.relative_error)
+
+        sketches = GroupSketches(metrics=("co2_ppm",))
+        sketches.update(
+            ["north", "south", "north"], ["A", "B", "C"], {"co2_ppm": np.array([400.0, 500.0, 600.0])}
+        )
+        summary = sketches.summary("north")
+        self.assertEqual(summary["distinct_sensors"], 2)
+        self.assertEqual(summary["co2_ppm_p99"], 600.0)
+
+    # Test Case 20: Warm Restart from State Snapshots
+    def test_state_snapshot_warm_restart(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            settings = PipelineSettings(
+                sensor_count=3, poll_delay=0.0, adaptive=True, dedup_window=64,
+                state_dir=tmp, snapshot_interval=0.05,
+            )
+            first = IngestionPipeline(settings, [MemorySink()])
+            first.poll_scheduler.add("SENSOR-1", "TrafficSensor")
+            for step, value in enumerate([20.0, 80.0, 10.0, 90.0]):
+                first.poll_scheduler.complete("SENSOR-1", float(step), value)
+            first.deduplicator.push([{"sensor_id": "DEV-1", "sequence": 7, "timestamp": 0.0}], 0.0)
+
+            async def run_briefly(pipeline: IngestionPipeline) -> None:
+                task = asyncio.create_task(pipeline.run())
+                await asyncio.sleep(0.2)
+                pipeline.request_stop()
+                await task
+
+            asyncio.run(run_briefly(first))
+            files = first.snapshotter.files("scheduler")
+            self.assertTrue(files[0].endswith(".full.npy"))
+            self.assertTrue(all(path.endswith(".delta.npy") for path in files[1:]))
+
+            # A new pipeline picks the state up before its first poll
+            second = IngestionPipeline(settings, [MemorySink()])
+            restored = second.snapshotter.restore()
+            self.assertGreaterEqual(restored["scheduler"], 3)  # the full file, plus any deltas
+            second.poll_scheduler.add("SENSOR-1", "TrafficSensor")
+            self.assertAlmostEqual(
+                second.poll_scheduler.interval("SENSOR-1"), first.poll_scheduler.interval("SENSOR-1")
+            )
+            self.assertLess(second.poll_scheduler.interval("SENSOR-1"), TrafficSensor.POLL_INTERVAL_SECONDS)
+            replayed = [{"sensor_id": "DEV-1", "sequence": 7, "timestamp": 0.0}]
+            self.assertEqual(second.deduplicator.push(replayed, 0.0), [])
+            self.assertEqual(second.deduplicator.duplicates, 1)
+
+            # Later snapshots are deltas of what changed; compaction folds
+            # them (and restored state of sensors not back yet) into one file
+            snapshotter = StateSnapshotter(
+                tmp, {"scheduler": second.poll_scheduler}, instance="delta", compact_every=1
+            )
+            self.assertEqual(asyncio.run(snapshotter.snapshot()), 3)
+            second.poll_scheduler.complete("SENSOR-1", 10.0, 95.0)
+            self.assertEqual(asyncio.run(snapshotter.snapshot()), 1)
+            self.assertEqual(len(snapshotter.files("scheduler")), 2)
+            self.assertEqual(asyncio.run(snapshotter.snapshot()), 3)
+            self.assertEqual([path[-9:] for path in snapshotter.files("scheduler")], [".full.npy"])
+            third = AdaptivePollScheduler()
+            snapshotter.sources = {"scheduler": third}
+            self.assertEqual(snapshotter.restore(), {"scheduler": 3})
+            third.add("SENSOR-1", "TrafficSensor")
+            self.assertAlmostEqual(third.interval("SENSOR-1"), second.poll_scheduler.interval("SENSOR-1"))
+
+    # Test Case 21: Device Catalog Indexes
+    def test_device_catalog_indexes(self) -> None:
+        catalog = DeviceCatalog(bucket_seconds=60.0)
+        for i in range(6):
+            catalog.register(
+                f"DEV-{i}", "FireSensor" if i % 2 else "TrafficSensor", zone="north" if i < 3 else "south"
+            )
+        catalog.mark_seen(["DEV-0", "DEV-1", "DEV-4"], 100.0)
+        catalog.mark_seen(["DEV-1"], 50.0)  # older report: ignored
+        catalog.set_health("DEV-1", "unhealthy")
+
+        self.assertEqual(catalog.query(sensor_type="FireSensor").tolist(), ["DEV-1", "DEV-3", "DEV-5"])
+        self.assertEqual(catalog.query(sensor_type="FireSensor", zone="north").tolist(), ["DEV-1"])
+        self.assertEqual(catalog.query(health="unhealthy").tolist(), ["DEV-1"])
+        self.assertEqual(catalog.query(seen_since=100.0).tolist(), ["DEV-0", "DEV-1", "DEV-4"])
+        self.assertEqual(catalog.query(seen_since=101.0).tolist(), [])
+        self.assertEqual(catalog.query(zone="south", seen_before=100.0).tolist(), ["DEV-3", "DEV-5"])
+
+        # Changes move devices between index entries
+        catalog.update("DEV-3", zone="north")
+        catalog.mark_seen(["DEV-3"], 200.0)
+        catalog.remove("DEV-0")
+        self.assertEqual(catalog.query(zone="north").tolist(), ["DEV-1", "DEV-2", "DEV-3"])
+        self.assertEqual(catalog.query(seen_since=150.0).tolist(), ["DEV-3"])
+        self.assertEqual(catalog.counts_by("zone"), {"north": 3, "south": 2})
+        self.assertEqual(
+            [s.tolist() for s in catalog.sectors(2)], [["DEV-1", "DEV-2"], ["DEV-3", "DEV-4"], ["DEV-5"]]
+        )
+
+        # A new device reuses DEV-0's slot but still sorts last; re-registering keeps zone and health
+        catalog.register("DEV-NEW", "FireSensor", zone="north")
+        catalog.register("DEV-1", "FireSensor")
+        self.assertEqual(catalog.query(zone="north").tolist(), ["DEV-1", "DEV-2", "DEV-3", "DEV-NEW"])
+        self.assertEqual(catalog.get("DEV-1").health, "unhealthy")
+        self.assertEqual(catalog.get("DEV-1").zone, "north")
+
+        with self.assertRaises(ValueError):
+            catalog.register("DEV-9", "NoSuchSensor")
+        with self.assertRaises(ValueError):
+            catalog.query(sensor_type="NoSuchSensor")
+
+        # The pipeline polls from its catalog and keeps it current
+        pipeline = IngestionPipeline(
+            PipelineSettings(sensor_count=3, sector_size=2, poll_delay=0.0, adaptive=True), [MemorySink()],
+            sensor_types={"SENSOR-4": "TrafficSensor", "SENSOR-2": "NoSuchSensor"},
+        )
+        self.assertEqual(pipeline._sectors(), [["SENSOR-1", "SENSOR-2"], ["SENSOR-3"]])
+        # Untyped and unknown types get the neutral default with the default poll timing
+        self.assertEqual(pipeline.catalog.get("SENSOR-1").sensor_type, "EnvironmentSensor")
+        self.assertEqual(pipeline.catalog.get("SENSOR-2").sensor_type, "EnvironmentSensor")
+        self.assertEqual(pipeline.poll_scheduler.policy_for("EnvironmentSensor").base_interval,
+                         AbstractSensor.POLL_INTERVAL_SECONDS)
+        pipeline.sensor_ids = ["SENSOR-3", "SENSOR-4"]  # shard rebalance
+        self.assertEqual(pipeline.catalog.query().tolist(), ["SENSOR-3", "SENSOR-4"])
+        self.assertEqual(pipeline.catalog.get("SENSOR-4").sensor_type, "TrafficSensor")
+
+        async def run_briefly() -> None:
+            task = asyncio.create_task(pipeline.run())
+            await asyncio.sleep(0.1)
+            pipeline.request_stop()
+            await task
+
+        started = time.time()
+        asyncio.run(run_briefly())
+        self.assertEqual(pipeline.catalog.query(health="healthy", seen_since=started).tolist(),
+                         ["SENSOR-3", "SENSOR-4"])
+        self.assertEqual(pipeline.poll_scheduler.policy_for("TrafficSensor").base_interval,
+                         TrafficSensor.POLL_INTERVAL_SECONDS)
+        self.assertLessEqual(
+            pipeline.poll_scheduler.interval("SENSOR-3"), AbstractSensor.MAX_POLL_INTERVAL_SECONDS
+        )
+        sensors = [TrafficSensor("T-1"), FireSensor("F-1", EmergencyResponseSystem())]
+        self.assertEqual(DeviceCatalog().check_health(sensors), 0)
+
 
 if __name__ == "__main__":
     unittest.main()